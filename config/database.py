@@ -1,12 +1,19 @@
 import os
+import threading
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, LargeBinary, Index, text, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from config.settings import DATABASE_CONFIG
 
 load_dotenv()
 
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+_session_factory = None
+
 Base = declarative_base()
 
 class RawListing(Base):
@@ -23,8 +30,18 @@ class RawListing(Base):
     bathrooms_raw = Column(String(50))
     area_raw = Column(String(100))
     property_type_raw = Column(String(100))
+    # Hash of the scraped fields (scripts/loaders/fingerprint.py); a re-scrape with the same hash is unchanged
+    content_hash = Column(String(32))
     scraped_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Known-URL lookups for incremental crawls filter by site
+        Index('ix_raw_listings_source_site', 'source_site'),
+        # Rows arrive in scrape order, so a tiny BRIN index prunes time-range scans much like
+        # monthly partitions would, without giving up the global unique listing_url
+        Index('ix_raw_listings_scraped_at_brin', 'scraped_at', postgresql_using='brin'),
+    )
+    
 class CleanedListing(Base):
     __tablename__ = 'cleaned_listings'
     
@@ -41,8 +58,98 @@ class CleanedListing(Base):
     bathrooms = Column(Integer)
     area_sqm = Column(Float)
     property_type = Column(String(100))
+    # Hash of the raw fields this row was cleaned from
+    content_hash = Column(String(32))
+    # id of the first cleaned listing of the same property, shared by its near-duplicates on any site
+    property_id = Column(Integer)
     scraped_at = Column(DateTime)
     cleaned_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Matched to sql/analytics_queries.sql; partial predicates mirror the queries' IS NOT NULL filters
+    # and INCLUDE columns let the aggregates run as index-only scans
+    __table_args__ = (
+        Index(
+            'ix_cleaned_listings_county_bedrooms_price', 'county', 'bedrooms', 'price_kes',
+            postgresql_include=['area_sqm'],
+            postgresql_where=text('price_kes IS NOT NULL AND county IS NOT NULL'),
+        ),
+        Index(
+            'ix_cleaned_listings_property_type_price', 'property_type', 'price_kes',
+            postgresql_where=text('property_type IS NOT NULL'),
+        ),
+        Index(
+            'ix_cleaned_listings_county_neighborhood', 'county', 'neighborhood',
+            postgresql_include=['price_kes', 'bedrooms'],
+            postgresql_where=text('neighborhood IS NOT NULL'),
+        ),
+        Index(
+            'ix_cleaned_listings_county_property_type_area', 'county', 'property_type',
+            postgresql_include=['price_kes', 'area_sqm'],
+            postgresql_where=text(
+                'price_kes IS NOT NULL AND area_sqm > 0 AND county IS NOT NULL AND property_type IS NOT NULL'
+            ),
+        ),
+        Index('ix_cleaned_listings_source_site_scraped_at', 'source_site', 'scraped_at'),
+        Index('ix_cleaned_listings_scraped_at', 'scraped_at'),
+        Index('ix_cleaned_listings_property_id', 'property_id'),
+    )
+
+class PriceSummaryColumns:
+    # Additive aggregates, so new listings can be merged in without rescanning cleaned_listings
+    listing_count = Column(Integer, nullable=False, default=0)
+    price_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0)
+    price_min = Column(Float)
+    price_max = Column(Float)
+    # Estimated from price_sketch, a serialized QuantileSketch that is merged on every load
+    median_price = Column(Float)
+    p90_price = Column(Float)
+    price_sketch = Column(LargeBinary)
+    bedrooms_count = Column(Integer, nullable=False, default=0)
+    bedrooms_sum = Column(Float, nullable=False, default=0)
+    area_count = Column(Integer, nullable=False, default=0)
+    area_sum = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class CountyPriceSummary(PriceSummaryColumns, Base):
+    __tablename__ = 'county_price_summary'
+    
+    county = Column(String(100), primary_key=True)
+
+class CountyBedroomPriceSummary(PriceSummaryColumns, Base):
+    __tablename__ = 'county_bedroom_price_summary'
+    
+    county = Column(String(100), primary_key=True)
+    bedrooms = Column(Integer, primary_key=True)
+
+class PropertyTypePriceSummary(PriceSummaryColumns, Base):
+    __tablename__ = 'property_type_price_summary'
+    
+    property_type = Column(String(100), primary_key=True)
+
+class NeighborhoodPriceSummary(PriceSummaryColumns, Base):
+    __tablename__ = 'neighborhood_price_summary'
+    
+    county = Column(String(100), primary_key=True)
+    neighborhood = Column(String(200), primary_key=True)
+
+class ListingPriceHistory(Base):
+    # Append-only: one row per listing per scrape whose content changed, so re-scrapes keep the prices
+    # that cleaned_listings overwrites. Location is copied in so time-range queries never join listings.
+    __tablename__ = 'listing_price_history'
+    
+    listing_url = Column(String(500), primary_key=True)
+    scraped_at = Column(DateTime, primary_key=True)
+    source_site = Column(String(100), nullable=False)
+    county = Column(String(100))
+    neighborhood = Column(String(200))
+    price_kes = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        # Rows are appended in scrape order, so a BRIN index prunes a time window to a few block ranges;
+        # the primary key serves per-listing lookups of the previous price
+        Index('ix_listing_price_history_scraped_at_brin', 'scraped_at', postgresql_using='brin'),
+    )
 
 def get_database_url():
     host = os.getenv('AIVEN_DB_HOST')
@@ -54,15 +161,55 @@ def get_database_url():
     return f"postgresql://{user}:{password}@{host}:{port}/{name}?sslmode=require"
 
 def get_engine():
-    database_url = get_database_url()
-    return create_engine(database_url, echo=False, pool_pre_ping=True)
+    # One pooled engine per process, so tasks and loaders reuse connections instead of paying
+    # a new TLS handshake to the remote database each time
+    global _engine, _engine_pid, _session_factory
+    with _engine_lock:
+        if _engine is not None and _engine_pid != os.getpid():
+            # Connections inherited from a forked parent must not be shared with it
+            _engine.dispose(close=False)
+            _engine = None
+        if _engine is None:
+            _engine = create_engine(
+                get_database_url(),
+                echo=False,
+                pool_pre_ping=True,
+                pool_size=DATABASE_CONFIG['pool_size'],
+                max_overflow=DATABASE_CONFIG['max_overflow'],
+                pool_recycle=DATABASE_CONFIG['pool_recycle'],
+                pool_timeout=DATABASE_CONFIG['pool_timeout'],
+            )
+            _engine_pid = os.getpid()
+            _session_factory = sessionmaker(bind=_engine)
+        return _engine
 
 def create_tables():
     engine = get_engine()
     Base.metadata.create_all(engine)
+    ensure_columns(engine)
+    ensure_indexes(engine)
     return engine
 
+def ensure_columns(engine):
+    # Adds nullable columns introduced since a table was created; create_all never alters tables
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+def ensure_indexes(engine):
+    # create_all only indexes tables it creates; this adds indexes introduced since a table was built
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+def get_session_factory():
+    get_engine()
+    return _session_factory
+
 def get_session():
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
\ No newline at end of file
+    return get_session_factory()()
\ No newline at end of file
@@ -4,36 +4,117 @@ from dotenv import load_dotenv
 load_dotenv()
 
 SCRAPING_CONFIG = {
-    'delay_min': int(os.getenv('SCRAPING_DELAY_MIN', 2)),
-    'delay_max': int(os.getenv('SCRAPING_DELAY_MAX', 5)),
+    # Token-bucket politeness limit, applied per host across all scraper instances
+    'requests_per_second': float(os.getenv('REQUESTS_PER_SECOND', 0.5)),
+    'burst': int(os.getenv('REQUEST_BURST', 2)),
+    'max_concurrency_per_host': int(os.getenv('MAX_CONCURRENCY_PER_HOST', 3)),
+    'async_fetch': os.getenv('ASYNC_FETCH', 'true').lower() == 'true',
+    # BeautifulSoup tree builder: 'lxml' (fastest), 'html.parser' (stdlib) or 'html5lib'
+    'html_parser': os.getenv('HTML_PARSER', 'lxml'),
+    # On-disk HTTP cache: conditional GETs with ETag/Last-Modified, gzip bodies, size/age eviction
+    'cache_enabled': os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true',
+    'cache_dir': os.getenv('HTTP_CACHE_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.http_cache'),
+    'cache_max_mb': int(os.getenv('HTTP_CACHE_MAX_MB', 200)),
+    'cache_max_age_hours': int(os.getenv('HTTP_CACHE_MAX_AGE_HOURS', 72)),
+    # Pages validated this recently are served without a request, so a failed run can be retried offline
+    'cache_fresh_minutes': int(os.getenv('HTTP_CACHE_FRESH_MINUTES', 360)),
+    # Incremental crawl stops paginating once this share of a page is already in raw_listings
+    'incremental': os.getenv('INCREMENTAL_CRAWL', 'true').lower() == 'true',
+    'incremental_stop_ratio': float(os.getenv('INCREMENTAL_STOP_RATIO', 0.8)),
+    'bloom_filter_threshold': int(os.getenv('BLOOM_FILTER_THRESHOLD', 100000)),
     'timeout': int(os.getenv('REQUEST_TIMEOUT', 30)),
     # Updated User-Agent to avoid basic bot detection on Kenyan portals
     'user_agent': os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'),
 }
 
+DATABASE_CONFIG = {
+    # Pool for the single engine shared by every loader and task in a process
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+    # Seconds before a pooled connection is replaced, kept under the server's idle timeout
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+}
+
+LOADER_CONFIG = {
+    # Batched INSERT ... ON CONFLICT (listing_url) DO NOTHING instead of a SELECT per listing
+    'bulk_load': os.getenv('BULK_LOAD', 'true').lower() == 'true',
+    'batch_size': int(os.getenv('LOAD_BATCH_SIZE', 1000)),
+    # Fold each load's new cleaned listings into the *_price_summary tables
+    'refresh_summaries': os.getenv('REFRESH_SUMMARIES', 'true').lower() == 'true',
+    # Append each new or changed cleaned listing's price to listing_price_history
+    'record_price_history': os.getenv('RECORD_PRICE_HISTORY', 'true').lower() == 'true',
+    # Relative error bound of the price quantile sketches kept on each summary row
+    'sketch_relative_accuracy': float(os.getenv('PRICE_SKETCH_ACCURACY', 0.01)),
+}
+
+STAGING_CONFIG = {
+    # Extract tasks stage listings here as Parquet and pass only the file paths through XCom
+    'dir': os.getenv('STAGING_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.staging'),
+    'compression': os.getenv('STAGING_COMPRESSION', 'zstd'),
+}
+
+SNAPSHOT_CONFIG = {
+    # Local Parquet copy of cleaned_listings for analysis, so notebooks never pull from the remote database
+    'dir': os.getenv('SNAPSHOT_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.snapshot'),
+    # Hive-style partition column: 'county' or 'scrape_date'
+    'partition_by': os.getenv('SNAPSHOT_PARTITION_BY', 'county'),
+    'compression': os.getenv('SNAPSHOT_COMPRESSION', 'zstd'),
+}
+
+TRANSFORM_CONFIG = {
+    # 'vectorized' parses whole columns with Arrow compute kernels; 'apply' runs the per-row parsers
+    'engine': os.getenv('TRANSFORM_ENGINE', 'vectorized'),
+    # Distinct raw values remembered per parsed field
+    'parse_cache_size': int(os.getenv('PARSE_CACHE_SIZE', '100000')),
+    # Rows per chunk when re-cleaning raw_listings straight from the database
+    'chunk_size': int(os.getenv('TRANSFORM_CHUNK_SIZE', '5000')),
+    # Worker processes for the transform; 1 runs in-process, 0 uses every core
+    'workers': int(os.getenv('TRANSFORM_WORKERS', '1')),
+}
+
+DEDUP_CONFIG = {
+    # MinHash permutations, split into LSH bands; with 16 bands of 4 rows, listings about 50% similar
+    # or more become candidates
+    'num_perm': int(os.getenv('DEDUP_NUM_PERM', '64')),
+    'bands': int(os.getenv('DEDUP_BANDS', '16')),
+    # Words per shingle of title + description; pairs of words tolerate reworded copies better than triples
+    'shingle_size': int(os.getenv('DEDUP_SHINGLE_SIZE', '2')),
+    # Candidates are the same property when this share of signature slots match and prices are this close
+    'similarity_threshold': float(os.getenv('DEDUP_SIMILARITY_THRESHOLD', '0.5')),
+    'price_tolerance': float(os.getenv('DEDUP_PRICE_TOLERANCE', '0.05')),
+}
+
 SITE_CONFIGS = {
     'buyrentkenya': {
         'base_url': 'https://www.buyrentkenya.com',
         'search_url': 'https://www.buyrentkenya.com/property-for-sale', # Updated from /discover
         'max_pages': 10,
+        # Page ranges of this size run as separate, independently retried DAG tasks that split the
+        # site's request rate. Only full crawls (INCREMENTAL_CRAWL=false, or a DAG run triggered with
+        # {"full_crawl": true}) use the ranges; incremental crawls run in the first range's task
+        'pages_per_task': 5,
         'enabled': True,
     },
     'property24': {
         'base_url': 'https://www.property24.co.ke',
         'search_url': 'https://www.property24.co.ke/property-for-sale',
         'max_pages': 10,
+        'pages_per_task': 5,
         'enabled': True,
     },
     'pigiame': {
         'base_url': 'https://www.pigiame.co.ke',
         'search_url': 'https://www.pigiame.co.ke/houses-for-sale', # Updated from /housing-real-estate
         'max_pages': 10,
+        'pages_per_task': 5,
         'enabled': True,
     },
     'haofinder': {
         'base_url': 'https://www.haofinder.com',
         'search_url': 'https://www.haofinder.com/properties', # Updated from /property-for-sale-in-kenya
         'max_pages': 10,
+        'pages_per_task': 5,
         'enabled': True,
     },
 }
@@ -2,7 +2,6 @@ from airflow import DAG
 from airflow.operators.python import PythonOperator
 from airflow.utils.dates import days_ago
 from datetime import datetime, timedelta
-import pandas as pd
 import sys
 import os
 
@@ -11,10 +10,14 @@ win_project_root = "/mnt/c/Users/Administrator/Documents/Luxdev/Kenya-Real-Estat
 if win_project_root not in sys.path:
     sys.path.insert(0, win_project_root)
 
-from scripts.extractors import BuyRentKenyaScraper, Property24Scraper, PigiameScraper, HaoFinderScraper
+from scripts.extractors import SCRAPERS
 from scripts.transformers import DataTransformer
 from scripts.loaders import DatabaseLoader
+from scripts.loaders.staging import write_listings, read_listings, remove_run
+from scripts.loaders.snapshot import export_cleaned_listings
+from scripts.run_reclean import reclean_raw_listings
 from config.database import create_tables
+from config.settings import SCRAPING_CONFIG, SITE_CONFIGS, LOADER_CONFIG
 
 default_args = {
     'owner': 'data-engineer',
@@ -47,114 +50,155 @@ def initialize_database(**context):
         logger.error(f"Error creating tables: {e}")
         raise
 
-def extract_buyrentkenya(**context):
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info("Starting extraction from BuyRentKenya")
-    
-    scraper = BuyRentKenyaScraper()
-    listings = scraper.extract_listings(max_pages=5)
-    
-    logger.info(f"Extracted {len(listings)} listings from BuyRentKenya")
-    context['ti'].xcom_push(key='buyrentkenya_listings', value=listings)
-    return len(listings)
+def enable_incremental_crawl(scraper):
+    if not SCRAPING_CONFIG['incremental']:
+        return
+    with DatabaseLoader() as loader:
+        scraper.known_urls = loader.get_known_listing_urls(scraper.site_name)
+
+def page_partitions(site_config: dict) -> list:
+    # (start_page, page_count) ranges covering max_pages, pages_per_task pages at a time
+    max_pages = site_config['max_pages']
+    size = site_config.get('pages_per_task') or max_pages
+    return [(start_page, min(size, max_pages - start_page + 1)) for start_page in range(1, max_pages + 1, size)]
+
+def partition_name(site_name: str, start_page: int, page_count: int) -> str:
+    return f"{site_name}_pages_{start_page}_{start_page + page_count - 1}"
+
+def extract_task_ids(site_name: str) -> list:
+    return [
+        f"extract_{partition_name(site_name, start_page, page_count)}"
+        for start_page, page_count in page_partitions(SITE_CONFIGS[site_name])
+    ]
+
+def reclean_requested(context) -> bool:
+    dag_run = context.get('dag_run')
+    return bool(dag_run and dag_run.conf and dag_run.conf.get('reclean'))
+
+def full_crawl_requested(context) -> bool:
+    # Crawls every page range in parallel when incremental crawling is off, or for a run triggered
+    # with {"full_crawl": true}
+    dag_run = context.get('dag_run')
+    return not SCRAPING_CONFIG['incremental'] or bool(dag_run and dag_run.conf and dag_run.conf.get('full_crawl'))
+
+def read_staged_listings(ti, site_name: str):
+    # XCom only carries the Parquet paths written by the site's extract tasks
+    return read_listings(ti.xcom_pull(key='staged_path', task_ids=extract_task_ids(site_name)) or [])
 
-def extract_property24(**context):
+def cleanup_staging(**context):
+    remove_run(context['run_id'])
+
+def extract_site_pages(site_name: str, start_page: int, page_count: int, **context):
     import logging
     logger = logging.getLogger(__name__)
-    logger.info("Starting extraction from Property24")
+    logger.info(f"Starting extraction from {site_name}, pages {start_page}-{start_page + page_count - 1}")
     
-    scraper = Property24Scraper()
-    listings = scraper.extract_listings(max_pages=5)
+    name = partition_name(site_name, start_page, page_count)
+    scraper = SCRAPERS[site_name]()
+    if full_crawl_requested(context):
+        # Each extract task runs in its own process with its own token bucket, so the site's request
+        # rate is split between the tasks crawling it
+        scraper.rate_share = 1 / len(page_partitions(SITE_CONFIGS[site_name]))
+    else:
+        # An incremental crawl stops at the first mostly-known page, which only one task crawling the
+        # pages in order can do: the first range's task crawls them all and the others skip
+        if start_page != 1:
+            logger.info(f"Incremental crawl: pages {start_page}+ of {site_name} are crawled by the first page range")
+            return 0
+        page_count = SITE_CONFIGS[site_name]['max_pages']
+        enable_incremental_crawl(scraper)
+    listings = scraper.extract_listings(max_pages=page_count, start_page=start_page)
     
-    logger.info(f"Extracted {len(listings)} listings from Property24")
-    context['ti'].xcom_push(key='property24_listings', value=listings)
+    logger.info(f"Extracted {len(listings)} listings from {site_name}")
+    path = write_listings(listings, name, context['run_id'])
+    context['ti'].xcom_push(key='staged_path', value=path)
     return len(listings)
 
-def extract_pigiame(**context):
+def load_site_raw(site_name: str, **context):
     import logging
     logger = logging.getLogger(__name__)
-    logger.info("Starting extraction from PigiaMe")
+    logger.info(f"Loading {site_name} listings to raw table")
     
-    scraper = PigiameScraper()
-    listings = scraper.extract_listings(max_pages=5)
+    listings = read_staged_listings(context['ti'], site_name)
     
-    logger.info(f"Extracted {len(listings)} listings from PigiaMe")
-    context['ti'].xcom_push(key='pigiame_listings', value=listings)
-    return len(listings)
-
-def extract_haofinder(**context):
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info("Starting extraction from HaoFinder")
+    if listings.num_rows == 0:
+        logger.warning(f"No listings extracted from {site_name}")
+        return 0
     
-    scraper = HaoFinderScraper()
-    listings = scraper.extract_listings(max_pages=5)
+    with DatabaseLoader() as loader:
+        inserted_count = loader.load_raw_listings(listings.to_pylist())
     
-    logger.info(f"Extracted {len(listings)} listings from HaoFinder")
-    context['ti'].xcom_push(key='haofinder_listings', value=listings)
-    return len(listings)
+    return inserted_count
 
-def merge_and_load_raw(**context):
+def transform_and_load_site(site_name: str, **context):
     import logging
     logger = logging.getLogger(__name__)
-    logger.info("Merging listings from all sources and loading to raw table")
+    logger.info(f"Transforming {site_name} listings and loading to cleaned table")
     
-    ti = context['ti']
+    if reclean_requested(context):
+        # Triggered with {"reclean": true}: re-clean the site's whole raw history in chunks instead.
+        # The summaries are rebuilt once by rebuild_summaries after every site has finished.
+        conf = context['dag_run'].conf
+        return reclean_raw_listings(
+            chunk_size=conf.get('chunk_size'), source_site=site_name, refresh_summaries=False
+        )['inserted']
     
-    buyrentkenya_listings = ti.xcom_pull(key='buyrentkenya_listings', task_ids='extract_buyrentkenya') or []
-    property24_listings = ti.xcom_pull(key='property24_listings', task_ids='extract_property24') or []
-    pigiame_listings = ti.xcom_pull(key='pigiame_listings', task_ids='extract_pigiame') or []
-    haofinder_listings = ti.xcom_pull(key='haofinder_listings', task_ids='extract_haofinder') or []
+    listings = read_staged_listings(context['ti'], site_name)
     
-    all_listings = buyrentkenya_listings + property24_listings + pigiame_listings + haofinder_listings
+    if listings.num_rows == 0:
+        logger.warning(f"No {site_name} listings to transform")
+        return 0
     
-    logger.info(f"Total listings from all sources: {len(all_listings)}")
+    # Re-scraped listings whose content hash matches their cleaned row skip the transformer entirely
+    with DatabaseLoader() as loader:
+        df_changed = loader.changed_listings(listings.to_pandas())
     
-    if len(all_listings) == 0:
-        logger.warning("No listings extracted from any source")
+    if df_changed.empty:
+        logger.info(f"No new or changed {site_name} listings to transform")
         return 0
     
-    loader = DatabaseLoader()
-    inserted_count = loader.load_raw_listings(all_listings)
-    loader.close()
+    transformer = DataTransformer()
+    try:
+        df_cleaned = transformer.transform_listings(df_changed)
+        df_cleaned = transformer.deduplicate_listings(df_cleaned)
+    finally:
+        transformer.close()
+    
+    with DatabaseLoader() as loader:
+        inserted_count = loader.load_cleaned_listings(df_cleaned)
     
-    context['ti'].xcom_push(key='raw_inserted_count', value=inserted_count)
     return inserted_count
 
-def transform_and_load_cleaned(**context):
+def rebuild_summaries(**context):
     import logging
     logger = logging.getLogger(__name__)
-    logger.info("Transforming data and loading to cleaned table")
-    
-    ti = context['ti']
-    
-    buyrentkenya_listings = ti.xcom_pull(key='buyrentkenya_listings', task_ids='extract_buyrentkenya') or []
-    property24_listings = ti.xcom_pull(key='property24_listings', task_ids='extract_property24') or []
-    pigiame_listings = ti.xcom_pull(key='pigiame_listings', task_ids='extract_pigiame') or []
-    haofinder_listings = ti.xcom_pull(key='haofinder_listings', task_ids='extract_haofinder') or []
-    
-    all_listings = buyrentkenya_listings + property24_listings + pigiame_listings + haofinder_listings
-    
-    if len(all_listings) == 0:
-        logger.warning("No listings to transform")
-        return 0
     
-    df = pd.DataFrame(all_listings)
+    # Regular loads merge into the summaries as they write; only a re-clean replaces them wholesale
+    if not LOADER_CONFIG['refresh_summaries']:
+        return
+    if not reclean_requested(context):
+        logger.info("Price summaries were updated during the loads, skipping rebuild")
+        return
     
-    transformer = DataTransformer()
-    df_cleaned = transformer.transform_listings(df)
-    df_cleaned = transformer.deduplicate_listings(df_cleaned)
+    with DatabaseLoader() as loader:
+        loader.rebuild_summaries()
+
+def assign_property_ids(**context):
+    with DatabaseLoader() as loader:
+        return loader.assign_property_ids()
+
+def export_snapshot(**context):
+    return export_cleaned_listings()
+
+def report_statistics(**context):
+    import logging
+    logger = logging.getLogger(__name__)
     
-    loader = DatabaseLoader()
-    inserted_count = loader.load_cleaned_listings(df_cleaned)
+    with DatabaseLoader() as loader:
+        stats = loader.get_statistics()
     
-    stats = loader.get_statistics()
     logger.info(f"Database statistics: {stats}")
-    
-    loader.close()
-    
-    return inserted_count
+    return stats
 
 init_db_task = PythonOperator(
     task_id='initialize_database',
@@ -162,42 +206,74 @@ init_db_task = PythonOperator(
     dag=dag,
 )
 
-extract_buyrentkenya_task = PythonOperator(
-    task_id='extract_buyrentkenya',
-    python_callable=extract_buyrentkenya,
+# Every enabled site gets its own chain: one extract task per page range, then raw load, then
+# transform and cleaned load, so a slow site never holds back the others. Add sites or change
+# max_pages and pages_per_task in SITE_CONFIGS to change the fan-out.
+report_statistics_task = PythonOperator(
+    task_id='report_statistics',
+    python_callable=report_statistics,
+    trigger_rule='all_done',
     dag=dag,
 )
 
-extract_property24_task = PythonOperator(
-    task_id='extract_property24',
-    python_callable=extract_property24,
+rebuild_summaries_task = PythonOperator(
+    task_id='rebuild_summaries',
+    python_callable=rebuild_summaries,
+    trigger_rule='all_done',
     dag=dag,
 )
 
-extract_pigiame_task = PythonOperator(
-    task_id='extract_pigiame',
-    python_callable=extract_pigiame,
+assign_property_ids_task = PythonOperator(
+    task_id='assign_property_ids',
+    python_callable=assign_property_ids,
+    trigger_rule='all_done',
     dag=dag,
 )
 
-extract_haofinder_task = PythonOperator(
-    task_id='extract_haofinder',
-    python_callable=extract_haofinder,
+export_snapshot_task = PythonOperator(
+    task_id='export_snapshot',
+    python_callable=export_snapshot,
+    trigger_rule='all_done',
     dag=dag,
 )
 
-merge_load_raw_task = PythonOperator(
-    task_id='merge_and_load_raw',
-    python_callable=merge_and_load_raw,
+cleanup_staging_task = PythonOperator(
+    task_id='cleanup_staging',
+    python_callable=cleanup_staging,
+    trigger_rule='all_done',
     dag=dag,
 )
 
-transform_load_cleaned_task = PythonOperator(
-    task_id='transform_and_load_cleaned',
-    python_callable=transform_load_cleaned,
-    dag=dag,
-)
+for site_name, site_config in SITE_CONFIGS.items():
+    if not site_config.get('enabled') or site_name not in SCRAPERS:
+        continue
+    
+    extract_tasks = [
+        PythonOperator(
+            task_id=f"extract_{partition_name(site_name, start_page, page_count)}",
+            python_callable=extract_site_pages,
+            op_kwargs={'site_name': site_name, 'start_page': start_page, 'page_count': page_count},
+            dag=dag,
+        )
+        for start_page, page_count in page_partitions(site_config)
+    ]
+    
+    load_raw_task = PythonOperator(
+        task_id=f'load_raw_{site_name}',
+        python_callable=load_site_raw,
+        op_kwargs={'site_name': site_name},
+        dag=dag,
+    )
+    
+    transform_load_task = PythonOperator(
+        task_id=f'transform_and_load_{site_name}',
+        python_callable=transform_and_load_site,
+        op_kwargs={'site_name': site_name},
+        dag=dag,
+    )
+    
+    init_db_task >> extract_tasks >> load_raw_task >> transform_load_task >> [rebuild_summaries_task, assign_property_ids_task]
 
-init_db_task >> [extract_buyrentkenya_task, extract_property24_task, extract_pigiame_task, extract_haofinder_task]
-[extract_buyrentkenya_task, extract_property24_task, extract_pigiame_task, extract_haofinder_task] >> merge_load_raw_task
-merge_load_raw_task >> transform_load_cleaned_task
\ No newline at end of file
+rebuild_summaries_task >> report_statistics_task
+assign_property_ids_task >> export_snapshot_task
+report_statistics_task >> cleanup_staging_task
\ No newline at end of file
@@ -1,9 +1,17 @@
-import pandas as pd
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import duckdb
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sqlalchemy import create_engine
-import os
 from dotenv import load_dotenv
+from config.database import CleanedListing
+from config.settings import SNAPSHOT_CONFIG
+from scripts.loaders.snapshot import snapshot_glob
+from scripts.loaders.analysis_frames import query_listings
 
 load_dotenv()
 
@@ -16,23 +24,35 @@ name = os.getenv('AIVEN_DB_NAME')
 user = os.getenv('AIVEN_DB_USER')
 password = os.getenv('AIVEN_DB_PASSWORD')
 
-database_url = f"postgresql://{user}:{password}@{host}:{port}/{name}?sslmode=require"
-engine = create_engine(database_url)
-
-query = """
-SELECT * FROM cleaned_listings
-WHERE price_kes IS NOT NULL
-"""
-
-df = pd.read_sql(query, engine)
-print(f"Total listings: {len(df)}")
-print("\nData Overview:")
-print(df.info())
+# Aggregations run in DuckDB against the local Parquet snapshot (scripts/export_snapshot.py); it reads
+# only the columns and partitions each query touches. Without a snapshot, the columns the analysis
+# uses are pulled from the database once, with compact dtypes, and queried the same way.
+con = duckdb.connect()
+if os.path.isdir(SNAPSHOT_CONFIG['dir']):
+    con.execute(f"""
+        CREATE VIEW listings AS
+        SELECT * FROM read_parquet('{snapshot_glob()}', hive_partitioning = true)
+        WHERE price_kes IS NOT NULL
+    """)
+else:
+    database_url = f"postgresql://{user}:{password}@{host}:{port}/{name}?sslmode=require"
+    engine = create_engine(database_url)
+
+    df = query_listings(
+        ['source_site', 'county', 'neighborhood', 'bedrooms', 'bathrooms', 'area_sqm', 'property_type', 'price_kes'],
+        CleanedListing.price_kes.isnot(None),
+        engine=engine,
+    )
+    con.register('listings', df)
+
+print(f"Total listings: {con.sql('SELECT COUNT(*) FROM listings').fetchone()[0]}")
 print("\nStatistical Summary:")
-print(df.describe())
+print(con.sql("SUMMARIZE SELECT price_kes, bedrooms, bathrooms, area_sqm FROM listings").df())
 
 print("\n=== LISTINGS BY SOURCE ===")
-source_counts = df['source_site'].value_counts()
+source_counts = con.sql("""
+    SELECT source_site, COUNT(*) AS count FROM listings GROUP BY source_site ORDER BY count DESC
+""").df().set_index('source_site')['count']
 print(source_counts)
 
 plt.figure(figsize=(10, 6))
@@ -46,11 +66,14 @@ plt.savefig('listings_by_source.png')
 plt.close()
 
 print("\n=== AVERAGE PRICE BY COUNTY (TOP 10) ===")
-county_stats = df.groupby('county').agg({
-    'price_kes': ['mean', 'median', 'count']
-}).round(2)
-county_stats.columns = ['avg_price', 'median_price', 'count']
-county_stats = county_stats.sort_values('count', ascending=False).head(10)
+county_stats = con.sql("""
+    SELECT county, ROUND(AVG(price_kes), 2) AS avg_price, ROUND(MEDIAN(price_kes), 2) AS median_price, COUNT(*) AS count
+    FROM listings
+    WHERE county IS NOT NULL
+    GROUP BY county
+    ORDER BY count DESC
+    LIMIT 10
+""").df().set_index('county')
 print(county_stats)
 
 plt.figure(figsize=(12, 6))
@@ -63,7 +86,13 @@ plt.savefig('price_by_county.png')
 plt.close()
 
 print("\n=== PROPERTY TYPE DISTRIBUTION ===")
-property_types = df['property_type'].value_counts()
+property_types = con.sql("""
+    SELECT property_type, COUNT(*) AS count
+    FROM listings
+    WHERE property_type IS NOT NULL
+    GROUP BY property_type
+    ORDER BY count DESC
+""").df().set_index('property_type')['count']
 print(property_types)
 
 plt.figure(figsize=(10, 8))
@@ -76,7 +105,7 @@ plt.close()
 
 print("\n=== PRICE DISTRIBUTION ===")
 plt.figure(figsize=(12, 6))
-df['price_kes'].hist(bins=50, color='teal', edgecolor='black')
+con.sql("SELECT price_kes FROM listings").df()['price_kes'].hist(bins=50, color='teal', edgecolor='black')
 plt.title('Price Distribution', fontsize=14, fontweight='bold')
 plt.xlabel('Price (KES)')
 plt.ylabel('Frequency')
@@ -85,11 +114,13 @@ plt.savefig('price_distribution.png')
 plt.close()
 
 print("\n=== AVERAGE PRICE BY NUMBER OF BEDROOMS ===")
-bedroom_stats = df[df['bedrooms'].notna()].groupby('bedrooms').agg({
-    'price_kes': ['mean', 'median', 'count']
-}).round(2)
-bedroom_stats.columns = ['avg_price', 'median_price', 'count']
-bedroom_stats = bedroom_stats[bedroom_stats.index <= 6]
+bedroom_stats = con.sql("""
+    SELECT bedrooms, ROUND(AVG(price_kes), 2) AS avg_price, ROUND(MEDIAN(price_kes), 2) AS median_price, COUNT(*) AS count
+    FROM listings
+    WHERE bedrooms <= 6
+    GROUP BY bedrooms
+    ORDER BY bedrooms
+""").df().set_index('bedrooms')
 print(bedroom_stats)
 
 plt.figure(figsize=(10, 6))
@@ -103,12 +134,15 @@ plt.savefig('price_by_bedrooms.png')
 plt.close()
 
 print("\n=== NAIROBI NEIGHBORHOODS ANALYSIS ===")
-nairobi_df = df[df['county'] == 'Nairobi']
-neighborhood_stats = nairobi_df.groupby('neighborhood').agg({
-    'price_kes': ['mean', 'count']
-}).round(2)
-neighborhood_stats.columns = ['avg_price', 'count']
-neighborhood_stats = neighborhood_stats[neighborhood_stats['count'] >= 5].sort_values('avg_price', ascending=False).head(15)
+neighborhood_stats = con.sql("""
+    SELECT neighborhood, ROUND(AVG(price_kes), 2) AS avg_price, COUNT(*) AS count
+    FROM listings
+    WHERE county = 'Nairobi' AND neighborhood IS NOT NULL
+    GROUP BY neighborhood
+    HAVING COUNT(*) >= 5
+    ORDER BY avg_price DESC
+    LIMIT 15
+""").df().set_index('neighborhood')
 print(neighborhood_stats)
 
 plt.figure(figsize=(12, 8))
@@ -121,7 +155,7 @@ plt.savefig('nairobi_neighborhoods.png')
 plt.close()
 
 print("\n=== PRICE COMPARISON: NAIROBI VS MOMBASA ===")
-comparison_df = df[df['county'].isin(['Nairobi', 'Mombasa'])]
+comparison_df = con.sql("SELECT county, price_kes FROM listings WHERE county IN ('Nairobi', 'Mombasa')").df()
 comparison_stats = comparison_df.groupby('county')['price_kes'].agg(['mean', 'median', 'count']).round(2)
 print(comparison_stats)
 
@@ -136,13 +170,17 @@ plt.savefig('nairobi_vs_mombasa.png')
 plt.close()
 
 print("\n=== KEY INSIGHTS SUMMARY ===")
+total, avg_price, median_price, top_property_type, top_county, sources = con.sql("""
+    SELECT COUNT(*), AVG(price_kes), MEDIAN(price_kes), MODE(property_type), MODE(county), COUNT(DISTINCT source_site)
+    FROM listings
+""").fetchone()
 insights = {
-    'Total Listings': len(df),
-    'Average Price (KES)': f"{df['price_kes'].mean():,.2f}",
-    'Median Price (KES)': f"{df['price_kes'].median():,.2f}",
-    'Most Common Property Type': df['property_type'].mode()[0] if not df['property_type'].mode().empty else 'N/A',
-    'Most Listed County': df['county'].mode()[0] if not df['county'].mode().empty else 'N/A',
-    'Active Sources': df['source_site'].nunique(),
+    'Total Listings': total,
+    'Average Price (KES)': f"{avg_price:,.2f}",
+    'Median Price (KES)': f"{median_price:,.2f}",
+    'Most Common Property Type': top_property_type or 'N/A',
+    'Most Listed County': top_county or 'N/A',
+    'Active Sources': sources,
 }
 
 for key, value in insights.items():
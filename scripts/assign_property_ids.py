@@ -0,0 +1,26 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.loaders import DatabaseLoader
+from scripts.transformers.near_duplicates import NearDuplicateDetector
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Group near-duplicate cleaned listings across sites under one property id')
+    parser.add_argument('--chunk-size', type=int, help='Listings read per round trip (defaults to TRANSFORM_CHUNK_SIZE)')
+    parser.add_argument('--similarity-threshold', type=float, help='Defaults to DEDUP_SIMILARITY_THRESHOLD')
+    parser.add_argument('--price-tolerance', type=float, help='Defaults to DEDUP_PRICE_TOLERANCE')
+    args = parser.parse_args()
+
+    detector = NearDuplicateDetector(similarity_threshold=args.similarity_threshold, price_tolerance=args.price_tolerance)
+    with DatabaseLoader() as loader:
+        loader.assign_property_ids(detector, chunk_size=args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.loaders.analysis_frames import to_analysis_dtypes
+from config.settings import LOCATION_MAPPINGS, KENYAN_COUNTIES
+import argparse
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def generate_cleaned_listings(size: int, seed: int = 42) -> pd.DataFrame:
+    # Shaped like pd.read_sql over cleaned_listings: object text columns and float columns for the nullable integers
+    rng = np.random.default_rng(seed)
+    neighborhoods = [name.title() for name in LOCATION_MAPPINGS]
+    property_types = ['Apartment', 'House', 'Maisonette', 'Villa', 'Studio', 'Land', 'Commercial']
+
+    def pick(values, missing=0.0):
+        column = np.array(values, dtype=object)[rng.integers(0, len(values), size)]
+        column[rng.random(size) < missing] = None
+        return column
+
+    def numbers(low, high, missing):
+        column = rng.integers(low, high, size).astype('float64')
+        column[rng.random(size) < missing] = np.nan
+        return column
+
+    return pd.DataFrame({
+        'source_site': pick(['buyrentkenya', 'property24', 'pigiame', 'jiji']),
+        'county': pick(KENYAN_COUNTIES, 0.1),
+        'neighborhood': pick(neighborhoods, 0.3),
+        'bedrooms': numbers(1, 7, 0.2),
+        'bathrooms': numbers(1, 5, 0.4),
+        'area_sqm': rng.lognormal(5, 1, size).round(1),
+        'property_type': pick(property_types, 0.05),
+        'price_kes': rng.lognormal(16, 1.2, size).round(-3),
+    })
+
+def run_analyses(df: pd.DataFrame) -> list:
+    return [
+        df.groupby('county', observed=True)['price_kes'].agg(['mean', 'median', 'count']),
+        df.groupby(['county', 'bedrooms'], observed=True)['price_kes'].agg(['mean', 'count']),
+        df.groupby('neighborhood', observed=True)['area_sqm'].mean(),
+        df['property_type'].value_counts(),
+    ]
+
+def time_analyses(df: pd.DataFrame, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_analyses(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def check_results(default_df: pd.DataFrame, typed_df: pd.DataFrame) -> list:
+    mismatches = []
+    for i, (expected, actual) in enumerate(zip(run_analyses(default_df), run_analyses(typed_df))):
+        expected = expected.sort_index()
+        actual = actual.sort_index()
+        if len(expected) != len(actual) or not np.allclose(
+            expected.to_numpy(dtype='float64'), actual.to_numpy(dtype='float64'), rtol=1e-6
+        ):
+            mismatches.append(f"analysis {i} differs")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare memory and group-by speed of default and compact analysis dtypes')
+    parser.add_argument('--sizes', default='100000,1000000')
+    args = parser.parse_args()
+
+    for size in [int(size) for size in args.sizes.split(',')]:
+        default_df = generate_cleaned_listings(size)
+        typed_df = to_analysis_dtypes(default_df)
+
+        mismatches = check_results(default_df, typed_df)
+        if mismatches:
+            for mismatch in mismatches:
+                logger.error(f"{size:,} rows: {mismatch}")
+            sys.exit(1)
+
+        default_mb = default_df.memory_usage(deep=True).sum() / 1e6
+        typed_mb = typed_df.memory_usage(deep=True).sum() / 1e6
+        default_time = time_analyses(default_df)
+        typed_time = time_analyses(typed_df)
+        logger.info(
+            f"{size:>9,} rows: memory {default_mb:8.1f} MB -> {typed_mb:7.1f} MB ({default_mb / typed_mb:4.1f}x)  "
+            f"group-bys {default_time:6.3f}s -> {typed_time:6.3f}s ({default_time / typed_time:4.1f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.transformers.near_duplicates import NearDuplicateDetector, connected_components
+from config.settings import KENYAN_COUNTIES
+import argparse
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SITES = ['buyrentkenya', 'property24', 'pigiame']
+PROPERTY_TYPES = ['Apartment', 'House', 'Maisonette', 'Villa', 'Studio', 'Townhouse']
+
+def generate_listings(size: int, duplicate_share: float = 0.3, agent_share: float = 0.2, seed: int = 42) -> pd.DataFrame:
+    # Distinct properties, some re-posted on other sites with reworded titles, a few words of the
+    # description changed and the price moved by up to 3%. property_key is the ground truth.
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i}" for i in range(20000)], dtype=object)
+    # Agents reuse one boilerplate description across their properties; these near-identical texts
+    # must stay apart on price or county
+    boilerplates = [vocabulary[rng.zipf(1.3, 60) % len(vocabulary)] for _ in range(300)]
+
+    rows = []
+    property_key = 0
+    while len(rows) < size:
+        words = vocabulary[rng.zipf(1.3, rng.integers(30, 150)) % len(vocabulary)]
+        if rng.random() < agent_share:
+            words = np.concatenate([boilerplates[rng.integers(len(boilerplates))], words[:10]])
+        bedrooms = int(rng.integers(1, 6))
+        property_type = PROPERTY_TYPES[rng.integers(len(PROPERTY_TYPES))]
+        county = KENYAN_COUNTIES[rng.integers(len(KENYAN_COUNTIES))]
+        price = round(float(rng.lognormal(16, 1)), -3)
+        copies = 1 + (rng.random() < duplicate_share) * int(rng.integers(1, len(SITES)))
+
+        for copy, site in enumerate(rng.permutation(SITES)[:copies]):
+            description = words.copy()
+            if copy:
+                changed = rng.random(len(description)) < 0.05
+                description[changed] = vocabulary[rng.integers(0, len(vocabulary), changed.sum())]
+            title = (
+                f"{bedrooms} Bedroom {property_type} for sale in {county}" if copy % 2 == 0
+                else f"{property_type.upper()} - {bedrooms} BR, {county}"
+            )
+            rows.append({
+                'source_site': site,
+                'listing_url': f"https://{site}.example/listing/{len(rows)}",
+                'title': title,
+                'description': ' '.join(description),
+                'price_kes': price * (1 + rng.uniform(-0.03, 0.03)) if copy else price,
+                'county': county,
+                'property_key': property_key,
+            })
+        property_key += 1
+
+    df = pd.DataFrame(rows[:size])
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def pair_set(labels: np.ndarray) -> set:
+    pairs = set()
+    for members in pd.Series(np.arange(len(labels))).groupby(labels).groups.values():
+        members = sorted(members)
+        pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+    return pairs
+
+def brute_force(detector: NearDuplicateDetector, df: pd.DataFrame) -> np.ndarray:
+    # Every pair compared on the same signatures and checks: the O(n^2) baseline
+    signatures = detector.signatures(df)
+    left, right = np.triu_indices(len(df), k=1)
+    pairs = np.column_stack([left, right])
+    counties = pd.factorize(df['county'])[0]
+    kept = detector.verify(pairs, signatures, df['price_kes'].to_numpy(), counties)
+    return connected_components(len(df), kept)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MinHash/LSH near-duplicate detection against ground truth')
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--brute-force-size', type=int, default=3000, help='Also time all-pairs comparison at this size')
+    args = parser.parse_args()
+
+    detector = NearDuplicateDetector()
+
+    if args.brute_force_size:
+        df = generate_listings(args.brute_force_size)
+        started = time.perf_counter()
+        lsh_pairs = pair_set(detector.find_duplicates(df))
+        lsh_time = time.perf_counter() - started
+        started = time.perf_counter()
+        all_pairs = pair_set(brute_force(detector, df))
+        brute_time = time.perf_counter() - started
+        recall = len(lsh_pairs & all_pairs) / max(len(all_pairs), 1)
+        logger.info(
+            f"{len(df):>9,} rows: LSH {lsh_time:6.2f}s vs all pairs {brute_time:6.2f}s; "
+            f"LSH finds {recall:.1%} of the all-pairs matches"
+        )
+
+    for size in [int(size) for size in args.sizes.split(',')]:
+        df = generate_listings(size)
+        started = time.perf_counter()
+        labels = detector.find_duplicates(df)
+        total_time = time.perf_counter() - started
+
+        found = pair_set(labels)
+        expected = pair_set(df['property_key'].to_numpy())
+        precision = len(found & expected) / max(len(found), 1)
+        recall = len(found & expected) / max(len(expected), 1)
+        logger.info(
+            f"{size:>9,} rows: {total_time:6.2f}s, "
+            f"{len(df) - len(np.unique(labels)):,} duplicates of {len(np.unique(labels)):,} properties, "
+            f"precision {precision:.1%} recall {recall:.1%}"
+        )
+
+if __name__ == "__main__":
+    main()
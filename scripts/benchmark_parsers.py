@@ -0,0 +1,87 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.extractors import SCRAPERS
+from scripts.extractors.base_scraper import resolve_html_parser
+import argparse
+import glob
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'html'))
+BACKENDS = ['html.parser', 'lxml', 'html5lib']
+
+def save_fixtures(fixtures_dir: str, pages: int):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for site_name, scraper_class in SCRAPERS.items():
+        scraper = scraper_class()
+        for page_num in range(1, pages + 1):
+            content = scraper.fetch_content(scraper.build_page_url(page_num))
+            if content is None:
+                continue
+            path = os.path.join(fixtures_dir, f"{site_name}_page{page_num}.html")
+            with open(path, 'wb') as f:
+                f.write(content)
+            logger.info(f"Saved {path}")
+
+def benchmark_site(site_name: str, fixture_paths: list, backends: list, repeat: int) -> list:
+    scraper = SCRAPERS[site_name]()
+    pages = []
+    for path in fixture_paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+
+    results = []
+    for backend in backends:
+        scraper.html_parser = backend
+        listing_count = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            listing_count = 0
+            for content in pages:
+                listing_count += len(scraper.parse_listing_page(scraper.parse_html(content)))
+        elapsed = time.perf_counter() - started
+
+        results.append({
+            'backend': backend,
+            'ms_per_page': elapsed * 1000 / (repeat * len(pages)),
+            'listings': listing_count,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare HTML parser backends on saved listing pages')
+    parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', type=int, metavar='PAGES', help='Fetch and save this many search pages per site first')
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixtures(args.fixtures_dir, args.save)
+
+    backends = [backend for backend in BACKENDS if resolve_html_parser(backend) == backend]
+
+    for site_name in SCRAPERS:
+        fixture_paths = sorted(glob.glob(os.path.join(args.fixtures_dir, f"{site_name}*.html")))
+        if not fixture_paths:
+            logger.warning(f"No fixtures for {site_name} in {args.fixtures_dir}")
+            continue
+
+        logger.info(f"\n{'='*50}")
+        logger.info(f"{site_name} ({len(fixture_paths)} pages)")
+        logger.info(f"{'='*50}")
+        results = benchmark_site(site_name, fixture_paths, backends, args.repeat)
+        baseline = results[0]['ms_per_page']
+        for result in results:
+            logger.info(
+                f"  {result['backend']:<12} {result['ms_per_page']:8.2f} ms/page  "
+                f"{baseline / result['ms_per_page']:5.2f}x  {result['listings']} listings"
+            )
+
+if __name__ == "__main__":
+    main()
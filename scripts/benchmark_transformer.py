@@ -0,0 +1,164 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.transformers import DataTransformer
+from config.settings import LOCATION_MAPPINGS, PROPERTY_TYPE_MAPPINGS, KENYAN_COUNTIES
+import argparse
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger('scripts.transformers.data_transformer').setLevel(logging.WARNING)
+
+PARSED_COLUMNS = ['price_kes', 'county', 'neighborhood', 'bedrooms', 'bathrooms', 'area_sqm', 'property_type']
+
+# Raw values typical of the four sites, used for the timing runs
+TYPICAL_VALUES = {
+    'price_raw': [
+        'KSh 12,500,000', 'KES 8.5M', 'Ksh 45,000 / month', '1.2B', '350K', 'Price on request',
+        'N/A', 'KSh 3,200,000', 'Ksh 1,000,000 - 2,000,000', 'KSh 2,000,000 – 3,000,000',
+    ],
+    'location_raw': [
+        'Kilimani, Nairobi', 'Westlands', 'Upper Hill, Nairobi', 'Nyali, Mombasa', 'Diani Beach, Kwale',
+        'Ruiru, Kiambu', 'Kitengela', 'Eldoret Town', 'Some Estate, Nakuru', 'Kisumu', 'Naivasha',
+        'Karen Hardy, Nairobi', 'Homa Bay Town', "Murang'a", 'N/A', 'Kericho, Bomet', 'Kilimani – Nairobi',
+    ],
+    'bedrooms_raw': ['3 beds', '1 bed', '4', 'Studio', 'N/A', '10 bedrooms', '2 bedrooms'],
+    'bathrooms_raw': ['2 baths', '1 bath', '3', 'N/A', 'ensuite'],
+    'area_raw': ['120 sqm', '0.5 acres', '2 hectares', '1.5 ha', '450 m²', 'N/A', '1,200 sqm', '1/8 acre'],
+    'property_type_raw': [
+        'Apartment', 'Flat', 'Bedsitter', 'Townhouse', 'Maisonette', 'Villa', 'Office space', 'Plot',
+        'Warehouse', 'Bungalow', 'Penthouse', 'N/A', 'Commercial land',
+    ],
+}
+
+# Awkward inputs the two engines still have to agree on: missing values, malformed numbers,
+# Unicode digits, case-changing and whitespace characters outside ASCII
+EDGE_CASE_VALUES = {
+    'price_raw': [
+        'n/a', '', '  KSh 3,200,000  ', '5.5.5M', '.75M', '12.', 'KM', '٣٠٠٠', None, np.nan,
+        '99999999999999999999', 'KBM 100', '€ 150k', 'ıs 5M',
+    ],
+    'location_raw': [
+        'Unknown place', '', None, '  SOUTH C  ', 'İstanbul Road, Nairobi', 'Ruaka\xa0Town',
+        "Ng'ong'o, Kajiado", 'ⓚaren', '3rd Avenue, Nyali',
+    ],
+    'bedrooms_raw': [None, '2.5 beds', '٣ beds', ''],
+    'bathrooms_raw': [None, '007 baths'],
+    'area_raw': [None, 'shamba 3', '100.', 'sq ft', 'ACRE 1', '¼ acre', '80 m² (hab.)'],
+    'property_type_raw': ['n/a', None, '  House  ', 'Office\u2013Retail', '\ufb02at', 'Maisonette\xa0'],
+}
+
+def generate_listings(size: int, values_by_column: dict = TYPICAL_VALUES, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {
+        column: np.array(values, dtype=object)[rng.integers(0, len(values), size)]
+        for column, values in values_by_column.items()
+    }
+    data['listing_url'] = [f"https://example.com/listing/{i}" for i in range(size)]
+    return pd.DataFrame(data)
+
+def parsed_columns(engine: str, df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    transformer = DataTransformer(engine=engine)
+    if engine == 'vectorized':
+        transformer._parse_columns_vectorized(df)
+    else:
+        transformer._parse_columns_apply(df)
+    return df[PARSED_COLUMNS]
+
+def check_parity(df: pd.DataFrame) -> list:
+    expected = parsed_columns('apply', df)
+    actual = parsed_columns('vectorized', df)
+
+    mismatches = []
+    for column in PARSED_COLUMNS:
+        left = expected[column].astype(object).where(expected[column].notna(), None)
+        right = actual[column].astype(object).where(actual[column].notna(), None)
+        differs = [i for i, (a, b) in enumerate(zip(left, right)) if a != b]
+        if differs:
+            i = differs[0]
+            mismatches.append(f"{column}: {len(differs)} rows differ, e.g. {df.iloc[i].to_dict()} -> {left.iloc[i]!r} vs {right.iloc[i]!r}")
+        elif expected[column].dtype != actual[column].dtype and len(expected[column].dropna()) > 0:
+            mismatches.append(f"{column}: dtype {expected[column].dtype} vs {actual[column].dtype}")
+    return mismatches
+
+def check_matchers(df: pd.DataFrame) -> list:
+    # The compiled matchers must pick the same entry as scanning the tables in order
+    transformer = DataTransformer()
+    tables = [
+        ('location_raw', transformer.location_matcher, list(LOCATION_MAPPINGS)),
+        ('location_raw', transformer.county_matcher, [county.lower() for county in KENYAN_COUNTIES]),
+        ('property_type_raw', transformer.property_type_matcher, list(PROPERTY_TYPE_MAPPINGS)),
+    ]
+    mismatches = []
+    for column, matcher, patterns in tables:
+        for value in df[column].dropna().astype(str).str.strip().str.lower().unique():
+            expected = next((index for index, pattern in enumerate(patterns) if pattern in value), -1)
+            if matcher.first_match(value) != expected:
+                mismatches.append(f"{column}: {value!r} matched {matcher.first_match(value)}, expected {expected}")
+    return mismatches
+
+def add_synthetic_locations(count: int, seed: int = 7):
+    # Grows the gazetteer behind the real entries so existing first-match priority is unchanged
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    for _ in range(count):
+        name = ''.join(rng.choice(letters, rng.integers(6, 12)))
+        LOCATION_MAPPINGS.setdefault(name, {'county': str(rng.choice(KENYAN_COUNTIES)), 'neighborhood': name.title()})
+
+def time_engine(engine: str, df: pd.DataFrame, workers: int = 1) -> float:
+    transformer = DataTransformer(engine=engine, workers=workers)
+    try:
+        started = time.perf_counter()
+        transformer.transform_listings(df.copy())
+        return time.perf_counter() - started
+    finally:
+        transformer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Check vectorized/apply parity and benchmark DataTransformer engines')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--skip-apply-above', type=int, default=1000000, help='Skip the slow apply engine above this size')
+    parser.add_argument('--workers', type=int, default=1, help='Also time the vectorized engine with this many worker processes')
+    parser.add_argument('--extra-locations', type=int, default=0, help='Pad LOCATION_MAPPINGS with this many synthetic neighbourhoods')
+    args = parser.parse_args()
+
+    if args.extra_locations:
+        add_synthetic_locations(args.extra_locations)
+        logger.info(f"Gazetteer padded to {len(LOCATION_MAPPINGS)} location mappings")
+
+    all_values = {column: TYPICAL_VALUES[column] + EDGE_CASE_VALUES[column] for column in TYPICAL_VALUES}
+    parity_df = generate_listings(20000, all_values)
+    mismatches = check_matchers(parity_df) + check_parity(parity_df)
+    if mismatches:
+        for mismatch in mismatches:
+            logger.error(f"Parity failure - {mismatch}")
+        sys.exit(1)
+    logger.info("Parity check passed: vectorized engine matches the per-row parsers")
+
+    for size in [int(size) for size in args.sizes.split(',')]:
+        df = generate_listings(size)
+        vectorized_time = time_engine('vectorized', df)
+        if size <= args.skip_apply_above:
+            apply_time = time_engine('apply', df)
+            logger.info(
+                f"{size:>9,} rows: apply {apply_time:7.2f}s  vectorized {vectorized_time:7.2f}s  "
+                f"speedup {apply_time / vectorized_time:5.1f}x"
+            )
+        else:
+            logger.info(f"{size:>9,} rows: vectorized {vectorized_time:7.2f}s")
+        if args.workers > 1:
+            parallel_time = time_engine('vectorized', df, workers=args.workers)
+            logger.info(
+                f"{size:>9,} rows: vectorized x{args.workers} workers {parallel_time:7.2f}s  "
+                f"scaling {vectorized_time / parallel_time:5.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.database import get_engine
+from sqlalchemy import text
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SQL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'sql'))
+DEFAULT_QUERIES_PATHS = [
+    os.path.join(SQL_DIR, 'analytics_queries.sql'),
+    os.path.join(SQL_DIR, 'price_history_queries.sql'),
+]
+
+# Tables the default queries read; refreshed statistics keep the plans representative
+ANALYZED_TABLES = ['cleaned_listings', 'listing_price_history']
+
+# Whole-table reports with no selective filter; a sequential scan is the right plan for these
+FULL_SCAN_QUERIES = {'Listings with missing key fields'}
+
+def load_queries(path: str) -> list:
+    queries = []
+    title = None
+    lines = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('--'):
+                if title and ''.join(lines).strip():
+                    queries.append((title, ''.join(lines).strip().rstrip(';')))
+                title = line.lstrip('-').strip()
+                lines = []
+            else:
+                lines.append(line)
+    if title and ''.join(lines).strip():
+        queries.append((title, ''.join(lines).strip().rstrip(';')))
+    return queries
+
+def plan_nodes(plan: dict) -> list:
+    nodes = [plan]
+    for child in plan.get('Plans', []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+def explain(connection, query: str) -> list:
+    result = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+    return plan_nodes(result[0]['Plan'])
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN the analytics and price history queries and check that they use indexes')
+    parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES_PATHS)
+    parser.add_argument(
+        '--no-seqscan', action='store_true',
+        help='Discourage sequential scans, to confirm the indexes apply on small tables where a scan is cheaper',
+    )
+    args = parser.parse_args()
+
+    failures = []
+    with get_engine().connect() as connection:
+        for table in ANALYZED_TABLES:
+            connection.execute(text(f"ANALYZE {table}"))
+        if args.no_seqscan:
+            connection.execute(text("SET enable_seqscan = off"))
+
+        queries = [query for path in args.queries for query in load_queries(path)]
+        for title, query in queries:
+            nodes = explain(connection, query)
+            indexes = sorted({node['Index Name'] for node in nodes if 'Index Name' in node})
+            scans = sorted({node['Node Type'] for node in nodes if 'Scan' in node['Node Type']})
+
+            if indexes:
+                logger.info(f"OK    {title}: {', '.join(scans)} using {', '.join(indexes)}")
+            elif title in FULL_SCAN_QUERIES:
+                logger.info(f"SCAN  {title}: {', '.join(scans)} (expected)")
+            else:
+                logger.warning(f"NO INDEX  {title}: {', '.join(scans)}")
+                failures.append(title)
+
+    if failures:
+        logger.error(f"{len(failures)} queries do not use an index")
+        sys.exit(1)
+    logger.info("All queries use an index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.loaders.snapshot import export_cleaned_listings, PARTITION_COLUMNS
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export cleaned_listings to a partitioned Parquet snapshot for analysis')
+    parser.add_argument('--path', help='Snapshot directory (defaults to SNAPSHOT_DIR)')
+    parser.add_argument('--partition-by', choices=sorted(PARTITION_COLUMNS), help='Partition column (defaults to SNAPSHOT_PARTITION_BY)')
+    parser.add_argument('--chunk-size', type=int, help='Rows fetched per round trip (defaults to TRANSFORM_CHUNK_SIZE)')
+    args = parser.parse_args()
+
+    export_cleaned_listings(path=args.path, partition_by=args.partition_by, chunk_size=args.chunk_size)
+
+if __name__ == "__main__":
+    main()
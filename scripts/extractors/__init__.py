@@ -2,3 +2,10 @@ from .buyrentkenya_scraper import BuyRentKenyaScraper
 from .property24_scraper import Property24Scraper
 from .pigiame_scraper import PigiameScraper
 from .haofinder_scraper import HaoFinderScraper
+
+SCRAPERS = {
+    'buyrentkenya': BuyRentKenyaScraper,
+    'property24': Property24Scraper,
+    'pigiame': PigiameScraper,
+    'haofinder': HaoFinderScraper,
+}
\ No newline at end of file
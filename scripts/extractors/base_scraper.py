@@ -1,17 +1,68 @@
 import requests
-from bs4 import BeautifulSoup
+import httpx
+import asyncio
+import threading
+from collections import deque
+from bs4 import BeautifulSoup, FeatureNotFound
 import time
-import random
 import logging
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple, Iterator, AsyncIterator, Container
+from datetime import datetime
+from urllib.parse import urlparse
 from config.settings import SCRAPING_CONFIG
+from scripts.extractors.http_cache import HttpCache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def resolve_html_parser(name: str) -> str:
+    try:
+        BeautifulSoup('', name)
+        return name
+    except FeatureNotFound:
+        logger.warning(f"HTML parser '{name}' is not installed, falling back to html.parser")
+        return 'html.parser'
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        # Takes a token now (possibly going negative) and returns how long the caller must wait for it
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
 class BaseScraper:
+    # Shared by every scraper instance so the per-site request rate holds across tasks in one process
+    _host_limiters: Dict[str, TokenBucket] = {}
+    _host_limiters_lock = threading.Lock()
+
     def __init__(self, site_name: str):
         self.site_name = site_name
+        self.html_parser = resolve_html_parser(SCRAPING_CONFIG['html_parser'])
+        # Any container of listing URLs (set or BloomFilter); None disables incremental crawling
+        self.known_urls: Optional[Container[str]] = None
+        # Fraction of the per-site request rate this scraper may use, for when several processes
+        # crawl the same site at once and can't share a token bucket
+        self.rate_share = 1.0
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': SCRAPING_CONFIG['user_agent'],
@@ -21,27 +72,223 @@ class BaseScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
-        
+        self.cache = HttpCache(
+            SCRAPING_CONFIG['cache_dir'],
+            max_bytes=SCRAPING_CONFIG['cache_max_mb'] * 1024 * 1024,
+            max_age=SCRAPING_CONFIG['cache_max_age_hours'] * 3600,
+            fresh_for=SCRAPING_CONFIG['cache_fresh_minutes'] * 60,
+        ) if SCRAPING_CONFIG['cache_enabled'] else None
+
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        content = self.fetch_content(url)
+        return self.parse_html(content) if content is not None else None
+
+    def fetch_content(self, url: str) -> Optional[bytes]:
+        return self._fetch(url)[0]
+
+    def _fetch(self, url: str) -> Tuple[Optional[bytes], bool]:
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            logger.info(f"Cache hit: {url}")
+            return self._cached_body(url)
+
         try:
-            self._polite_delay()
+            self._polite_delay(url)
             logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=SCRAPING_CONFIG['timeout'])
+            response = self.session.get(
+                url, timeout=SCRAPING_CONFIG['timeout'], headers=self._conditional_headers(entry)
+            )
+            if response.status_code == 304 and entry:
+                self.cache.mark_validated(url, entry)
+                return self._cached_body(url)
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
+            return None, False
+
+        if self.cache:
+            self.cache.store(url, response.content, response.headers)
+        return response.content, False
+
+    async def fetch_page_async(self, client: httpx.AsyncClient, url: str, semaphore: asyncio.Semaphore) -> Optional[BeautifulSoup]:
+        content, _ = await self._fetch_async(client, url, semaphore)
+        return self.parse_html(content) if content is not None else None
+
+    async def _fetch_async(self, client: httpx.AsyncClient, url: str, semaphore: asyncio.Semaphore) -> Tuple[Optional[bytes], bool]:
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            logger.info(f"Cache hit: {url}")
+            return self._cached_body(url)
+
+        async with semaphore:
+            try:
+                await self._rate_limiter(url).acquire_async()
+                logger.info(f"Fetching: {url}")
+                response = await client.get(
+                    url, timeout=SCRAPING_CONFIG['timeout'], headers=self._conditional_headers(entry)
+                )
+                if response.status_code == 304 and entry:
+                    self.cache.mark_validated(url, entry)
+                    return self._cached_body(url)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.error(f"Error fetching {url}: {e}")
+                return None, False
+
+        if self.cache:
+            self.cache.store(url, response.content, response.headers)
+        return response.content, False
+
+    def _conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        return self.cache.conditional_headers(entry) if self.cache else {}
+
+    def _cached_body(self, url: str) -> Tuple[Optional[bytes], bool]:
+        # The second value marks the body as unchanged since it was last parsed
+        return self.cache.read_body(url), True
+
+    def parse_html(self, content: bytes) -> BeautifulSoup:
+        return BeautifulSoup(content, self.html_parser)
+
+    def _polite_delay(self, url: str):
+        self._rate_limiter(url).acquire()
+
+    def _rate_limiter(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with BaseScraper._host_limiters_lock:
+            if host not in BaseScraper._host_limiters:
+                BaseScraper._host_limiters[host] = TokenBucket(
+                    SCRAPING_CONFIG['requests_per_second'] * self.rate_share,
+                    max(1, int(SCRAPING_CONFIG['burst'] * self.rate_share)),
+                )
+            return BaseScraper._host_limiters[host]
+
+    def _new_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(headers=dict(self.session.headers), follow_redirects=True)
+
+    def build_page_url(self, page_num: int) -> str:
+        raise NotImplementedError("Subclasses must implement build_page_url method")
+
+    def extract_listings(self, max_pages: int = 5, start_page: int = 1) -> List[Dict]:
+        return list(self.iter_listings(max_pages, start_page))
+
+    def iter_listings(self, max_pages: int = 5, start_page: int = 1) -> Iterator[Dict]:
+        for listings in self.iter_pages(max_pages, start_page):
+            yield from listings
+
+    def iter_batches(self, max_pages: int = 5, batch_size: int = 50, start_page: int = 1) -> Iterator[List[Dict]]:
+        batch = []
+        for listing in self.iter_listings(max_pages, start_page):
+            batch.append(listing)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_pages(self, max_pages: int = 5, start_page: int = 1) -> Iterator[List[Dict]]:
+        # Crawls max_pages pages beginning at start_page, so a page range can run as its own task
+        if SCRAPING_CONFIG['async_fetch']:
+            yield from self._drive_async_pages(max_pages, start_page)
+            return
+
+        for page_num in range(start_page, start_page + max_pages):
+            page_url = self.build_page_url(page_num)
+            content, unchanged = self._fetch(page_url)
+            listings = self._handle_page(page_num, page_url, content, unchanged)
+            if listings is None:
+                continue
+            yield listings
+            if len(listings) == 0 or self._mostly_known(listings):
+                break
+
+    def _drive_async_pages(self, max_pages: int, start_page: int = 1) -> Iterator[List[Dict]]:
+        # Steps the async crawl one page at a time so callers can consume it as a plain generator
+        loop = asyncio.new_event_loop()
+        pages = self._iter_pages_async(max_pages, start_page)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(pages.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    async def _iter_pages_async(self, max_pages: int, start_page: int = 1) -> AsyncIterator[List[Dict]]:
+        concurrency = SCRAPING_CONFIG['max_concurrency_per_host']
+        semaphore = asyncio.Semaphore(concurrency)
+        page_nums = iter(range(start_page, start_page + max_pages))
+        pending = deque()
+
+        async with self._new_async_client() as client:
+            def schedule(window: int):
+                while len(pending) < window:
+                    page_num = next(page_nums, None)
+                    if page_num is None:
+                        return
+                    page_url = self.build_page_url(page_num)
+                    task = asyncio.create_task(self._fetch_async(client, page_url, semaphore))
+                    pending.append((page_num, page_url, task))
+
+            # Pages are requested ahead in a sliding window; the semaphore and token bucket keep the
+            # in-flight count and rate bounded while results are consumed strictly in page order.
+            # An incremental crawl fetches one page at a time until a page has no known listings,
+            # so stopping early doesn't leave requests already in flight.
+            window = 1 if self.known_urls is not None else concurrency
+            schedule(window)
+            try:
+                while pending:
+                    page_num, page_url, task = pending.popleft()
+                    content, unchanged = await task
+                    listings = self._handle_page(page_num, page_url, content, unchanged)
+                    if listings is not None:
+                        yield listings
+                        if len(listings) == 0 or self._mostly_known(listings):
+                            break
+                        if self.known_urls is not None:
+                            window = 1 if self._any_known(listings) else concurrency
+                    schedule(window)
+            finally:
+                for _, _, task in pending:
+                    task.cancel()
+                await asyncio.gather(*(task for _, _, task in pending), return_exceptions=True)
+
+    def _handle_page(self, page_num: int, url: str, content: Optional[bytes], unchanged: bool) -> Optional[List[Dict]]:
+        if content is None:
+            logger.warning(f"Failed to fetch page {page_num}")
             return None
-    
-    def _polite_delay(self):
-        delay = random.uniform(SCRAPING_CONFIG['delay_min'], SCRAPING_CONFIG['delay_max'])
-        time.sleep(delay)
-    
-    def extract_listings(self, max_pages: int = 5) -> list:
-        raise NotImplementedError("Subclasses must implement extract_listings method")
-    
+
+        listings = self.cache.read_parsed(url) if self.cache and unchanged else None
+        if listings is not None:
+            scraped_at = datetime.utcnow()
+            for listing in listings:
+                listing['scraped_at'] = scraped_at
+            logger.info(f"Reused {len(listings)} cached listings for unchanged page {page_num}")
+            return listings
+
+        listings = self.parse_listing_page(self.parse_html(content))
+        if self.cache:
+            self.cache.store_parsed(url, listings)
+        logger.info(f"Extracted {len(listings)} listings from page {page_num}")
+        return listings
+
+    def _mostly_known(self, listings: List[Dict]) -> bool:
+        # Incremental mode: later pages are older, so a page of already-loaded listings ends the crawl
+        if self.known_urls is None or not listings:
+            return False
+        known = sum(1 for listing in listings if listing['listing_url'] in self.known_urls)
+        if known / len(listings) >= SCRAPING_CONFIG['incremental_stop_ratio']:
+            logger.info(f"{known}/{len(listings)} listings already known, stopping incremental crawl")
+            return True
+        return False
+
+    def _any_known(self, listings: List[Dict]) -> bool:
+        return any(listing['listing_url'] in self.known_urls for listing in listings)
+
     def parse_listing_page(self, soup: BeautifulSoup) -> list:
         raise NotImplementedError("Subclasses must implement parse_listing_page method")
-    
+
     def extract_listing_details(self, listing_url: str) -> Optional[Dict]:
         raise NotImplementedError("Subclasses must implement extract_listing_details method")
\ No newline at end of file
@@ -15,26 +15,9 @@ class BuyRentKenyaScraper(BaseScraper):
         # Ensure site_name is set for the return dictionary
         self.site_name = 'buyrentkenya'
         
-    def extract_listings(self, max_pages: int = 5) -> List[Dict]:
-        all_listings = []
-        
-        for page_num in range(1, max_pages + 1):
-            # Using your config['search_url']
-            page_url = f"{self.config['search_url']}?page={page_num}"
-            soup = self.fetch_page(page_url)
-            
-            if not soup:
-                logger.warning(f"Failed to fetch page {page_num}")
-                continue
-                
-            listings = self.parse_listing_page(soup)
-            logger.info(f"Extracted {len(listings)} listings from page {page_num}")
-            all_listings.extend(listings)
-            
-            if len(listings) == 0:
-                break
-                
-        return all_listings
+    def build_page_url(self, page_num: int) -> str:
+        # Using your config['search_url']
+        return f"{self.config['search_url']}?page={page_num}"
     
     def parse_listing_page(self, soup: BeautifulSoup) -> List[Dict]:
         listings = []
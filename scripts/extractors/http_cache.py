@@ -0,0 +1,161 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Files making up one cached URL; they are aged and evicted together
+ENTRY_SUFFIXES = ['.json', '.html.gz', '.parsed.json.gz']
+
+class HttpCache:
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: float, fresh_for: float = 0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fresh_for = fresh_for
+        self._lock = threading.Lock()
+        # Bytes on disk as of the last full scan plus this instance's writes since; None until the
+        # first write scans the directory
+        self._size = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        meta_path = self._path(url, '.json')
+        if not os.path.exists(meta_path) or not os.path.exists(self._path(url, '.html.gz')):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['validated_at'] > self.max_age:
+            return None
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry['validated_at'] <= self.fresh_for
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        try:
+            with gzip.open(self._path(url, '.html.gz'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url: str, content: bytes, headers) -> None:
+        previous_size = self._entry_size(url)
+        now = time.time()
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': now,
+            'validated_at': now,
+        }
+        with gzip.open(self._path(url, '.html.gz'), 'wb') as f:
+            f.write(content)
+        self._write_meta(url, entry)
+        # A new body invalidates whatever was parsed from the previous one
+        parsed_path = self._path(url, '.parsed.json.gz')
+        if os.path.exists(parsed_path):
+            os.remove(parsed_path)
+        self._track(self._entry_size(url) - previous_size)
+
+    def mark_validated(self, url: str, entry: Dict) -> None:
+        entry['validated_at'] = time.time()
+        self._write_meta(url, entry)
+        # The parse of an unchanged body stays as recent as the body itself
+        for suffix in ['.html.gz', '.parsed.json.gz']:
+            try:
+                os.utime(self._path(url, suffix))
+            except OSError:
+                continue
+
+    def read_parsed(self, url: str) -> Optional[List[Dict]]:
+        try:
+            with gzip.open(self._path(url, '.parsed.json.gz'), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store_parsed(self, url: str, listings: List[Dict]) -> None:
+        previous_size = self._entry_size(url)
+        with gzip.open(self._path(url, '.parsed.json.gz'), 'wt', encoding='utf-8') as f:
+            json.dump(listings, f, default=str)
+        self._track(self._entry_size(url) - previous_size)
+
+    def _write_meta(self, url: str, entry: Dict) -> None:
+        tmp_path = self._path(url, '.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(url, '.json'))
+
+    def _entry_size(self, url: str) -> int:
+        size = 0
+        for suffix in ENTRY_SUFFIXES:
+            try:
+                size += os.path.getsize(self._path(url, suffix))
+            except OSError:
+                continue
+        return size
+
+    def _track(self, delta: int) -> None:
+        # The directory is only scanned on the first write and whenever the running total passes the cap
+        with self._lock:
+            if self._size is not None:
+                self._size += delta
+            needs_eviction = self._size is None or self._size > self.max_bytes
+        if needs_eviction:
+            self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            now = time.time()
+            entries = {}
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = entries.setdefault(name.split('.', 1)[0], [0.0, 0, []])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                entry[2].append(path)
+
+            # Expired entries go first, then least recently used until under the size cap. Trimming to
+            # below the cap leaves room for a run of writes before the next scan.
+            total_size = sum(size for _, size, _ in entries.values())
+            target_size = self.max_bytes * 0.9
+            removed = 0
+            for mtime, size, paths in sorted(entries.values()):
+                if now - mtime <= self.max_age and total_size <= target_size:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                total_size -= size
+                removed += 1
+
+            self._size = total_size
+            if removed:
+                logger.info(f"Evicted {removed} entries from HTTP cache")
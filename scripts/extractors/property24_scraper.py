@@ -14,27 +14,9 @@ class Property24Scraper(BaseScraper):
         # Site often requires a direct base_url for relative link joining
         self.base_url = "https://www.property24.co.ke"
         
-    def extract_listings(self, max_pages: int = 5) -> List[Dict]:
-        all_listings = []
-        
-        for page_num in range(1, max_pages + 1):
-            # 2026 UPDATE: Property24 uses ?Page= with a capital 'P'
-            page_url = f"{self.config['search_url']}?Page={page_num}"
-            soup = self.fetch_page(page_url)
-            
-            if not soup:
-                logger.warning(f"Failed to fetch page {page_num}")
-                continue
-                
-            listings = self.parse_listing_page(soup)
-            logger.info(f"Extracted {len(listings)} listings from page {page_num}")
-            all_listings.extend(listings)
-            
-            # Stop if no listings found on the page
-            if len(listings) == 0:
-                break
-                
-        return all_listings
+    def build_page_url(self, page_num: int) -> str:
+        # 2026 UPDATE: Property24 uses ?Page= with a capital 'P'
+        return f"{self.config['search_url']}?Page={page_num}"
     
     def parse_listing_page(self, soup: BeautifulSoup) -> List[Dict]:
         listings = []
@@ -0,0 +1 @@
+from .database_loader import DatabaseLoader
\ No newline at end of file
@@ -0,0 +1,234 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, delete, func, literal, tuple_, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from config.database import (
+    CleanedListing, CountyPriceSummary, CountyBedroomPriceSummary, PropertyTypePriceSummary, NeighborhoodPriceSummary,
+)
+from config.settings import LOADER_CONFIG
+from scripts.loaders.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# Summary table and the cleaned_listings columns it is grouped by
+SUMMARIES = [
+    (CountyPriceSummary, ['county']),
+    (CountyBedroomPriceSummary, ['county', 'bedrooms']),
+    (PropertyTypePriceSummary, ['property_type']),
+    (NeighborhoodPriceSummary, ['county', 'neighborhood']),
+]
+
+AGGREGATE_COLUMNS = [
+    'listing_count', 'price_count', 'price_sum', 'price_min', 'price_max',
+    'bedrooms_count', 'bedrooms_sum', 'area_count', 'area_sum', 'updated_at',
+]
+
+def _grouped_aggregates(keys: List[str], *filters):
+    key_columns = [getattr(CleanedListing, key) for key in keys]
+    price = CleanedListing.price_kes
+    return (
+        select(
+            *key_columns,
+            func.count(),
+            func.count(price),
+            func.coalesce(func.sum(price), 0),
+            func.min(price),
+            func.max(price),
+            func.count(CleanedListing.bedrooms),
+            func.coalesce(func.sum(CleanedListing.bedrooms), 0),
+            func.count(CleanedListing.area_sqm),
+            func.coalesce(func.sum(CleanedListing.area_sqm), 0),
+            literal(datetime.utcnow(), DateTime),
+        )
+        .where(*filters, *[column.isnot(None) for column in key_columns])
+        .group_by(*key_columns)
+        # A fixed key order makes concurrent per-site loads lock summary rows in the same order
+        .order_by(*key_columns)
+    )
+
+def merge_new_listings(session: Session, listing_ids: List[int]):
+    # Folds freshly inserted cleaned listings into the summaries; only those rows are aggregated
+    if not listing_ids:
+        return
+    new_rows = CleanedListing.id.in_(listing_ids)
+
+    for model, keys in SUMMARIES:
+        stmt = pg_insert(model).from_select(keys + AGGREGATE_COLUMNS, _grouped_aggregates(keys, new_rows))
+        current = model.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                **{
+                    column: current[column] + stmt.excluded[column]
+                    for column in ['listing_count', 'price_count', 'price_sum', 'bedrooms_count', 'bedrooms_sum', 'area_count', 'area_sum']
+                },
+                'price_min': func.least(current.price_min, stmt.excluded.price_min),
+                'price_max': func.greatest(current.price_max, stmt.excluded.price_max),
+                'updated_at': stmt.excluded.updated_at,
+            },
+        )
+        session.execute(stmt)
+
+    # The upsert above holds the summary row locks, so the sketches can be read and merged safely
+    for model, keys in SUMMARIES:
+        new_sketches = _price_sketches(session, keys, new_rows)
+        if not new_sketches:
+            continue
+        key_columns = [getattr(model, key) for key in keys]
+        stored = session.execute(
+            select(*key_columns, model.price_sketch)
+            .where(tuple_(*key_columns).in_(list(new_sketches)), model.price_sketch.isnot(None))
+        ).all()
+        for row in stored:
+            new_sketches[tuple(row[:-1])].merge(QuantileSketch.from_bytes(row[-1]))
+        _write_sketches(session, model, keys, new_sketches)
+
+def update_summaries(session: Session, inserted_ids: List[int], updated_ids: List[int], previous_rows: List[dict]):
+    # Inserted listings are merged in. Updated listings first have their previous values, as read
+    # before the update, subtracted from the groups they were in, then are merged in like new ones.
+    if not updated_ids:
+        merge_new_listings(session, inserted_ids)
+        return
+    listing_ids = list(inserted_ids) + list(updated_ids)
+    key_names = sorted({key for _, keys in SUMMARIES for key in keys})
+    current_rows = session.execute(
+        select(*[getattr(CleanedListing, key) for key in key_names]).where(CleanedListing.id.in_(listing_ids))
+    ).mappings().all()
+
+    touched_by_model = []
+    for model, keys in SUMMARIES:
+        removed = defaultdict(list)
+        for row in previous_rows:
+            key = tuple(row[name] for name in keys)
+            if None not in key:
+                removed[key].append(row)
+        touched = set(removed) | {
+            key for key in (tuple(row[name] for name in keys) for row in current_rows) if None not in key
+        }
+        if touched:
+            _subtract_previous(session, model, keys, touched, removed, CleanedListing.id.in_(listing_ids))
+            touched_by_model.append((model, keys, touched))
+
+    merge_new_listings(session, listing_ids)
+
+    # Groups every listing has left; they are only removed once nothing can be merged back into them
+    for model, keys, touched in touched_by_model:
+        session.execute(delete(model).where(
+            tuple_(*[getattr(model, key) for key in keys]).in_(list(touched)), model.listing_count == 0
+        ))
+
+def _subtract_previous(session: Session, model, keys: List[str], touched: set, removed: Dict[tuple, List[dict]], merged_rows):
+    key_columns = [getattr(model, key) for key in keys]
+    # Every group this batch writes is locked up front in key order, the order merge_new_listings
+    # upserts in, so concurrent per-site loads queue on the first shared row instead of deadlocking.
+    # Rows are updated in place rather than deleted and re-inserted, which would let a waiting load
+    # miss the row and take its lock later, out of order.
+    stored = session.execute(
+        select(model.__table__).where(tuple_(*key_columns).in_(list(touched))).order_by(*key_columns).with_for_update()
+    ).mappings().all()
+
+    now = datetime.utcnow()
+    rebuilt, updates = [], []
+    for summary in stored:
+        key = tuple(summary[name] for name in keys)
+        rows = removed.get(key)
+        if not rows:
+            continue
+        prices = [row['price_kes'] for row in rows if row['price_kes'] is not None]
+        bedrooms = [row['bedrooms'] for row in rows if row['bedrooms'] is not None]
+        areas = [row['area_sqm'] for row in rows if row['area_sqm'] is not None]
+
+        # Min and max can't be walked back, so a group losing one of its extremes is recomputed
+        if any(price in (summary['price_min'], summary['price_max']) for price in prices) or (prices and summary['price_sketch'] is None):
+            rebuilt.append(key)
+            continue
+
+        sketch = QuantileSketch.from_bytes(summary['price_sketch']) if summary['price_sketch'] is not None else None
+        if prices:
+            sketch.subtract(QuantileSketch.from_values(prices, sketch.relative_accuracy))
+        updates.append({
+            **dict(zip(keys, key)),
+            'listing_count': summary['listing_count'] - len(rows),
+            'price_count': summary['price_count'] - len(prices),
+            'price_sum': summary['price_sum'] - sum(prices),
+            'bedrooms_count': summary['bedrooms_count'] - len(bedrooms),
+            'bedrooms_sum': summary['bedrooms_sum'] - sum(bedrooms),
+            'area_count': summary['area_count'] - len(areas),
+            'area_sum': summary['area_sum'] - sum(areas),
+            'updated_at': now,
+            **_sketch_columns(sketch),
+        })
+
+    if rebuilt:
+        # Recomputed without this batch's listings, which merge_new_listings adds afterwards; a group
+        # with nothing else left is zeroed
+        in_rebuilt = tuple_(*[getattr(CleanedListing, key) for key in keys]).in_(rebuilt)
+        aggregates = {
+            tuple(row[:len(keys)]): dict(zip(AGGREGATE_COLUMNS, row[len(keys):]))
+            for row in session.execute(_grouped_aggregates(keys, in_rebuilt, ~merged_rows))
+        }
+        sketches = _price_sketches(session, keys, in_rebuilt, ~merged_rows)
+        empty = {
+            'listing_count': 0, 'price_count': 0, 'price_sum': 0, 'price_min': None, 'price_max': None,
+            'bedrooms_count': 0, 'bedrooms_sum': 0, 'area_count': 0, 'area_sum': 0, 'updated_at': now,
+        }
+        for key in rebuilt:
+            updates.append({**dict(zip(keys, key)), **aggregates.get(key, empty), **_sketch_columns(sketches.get(key))})
+
+    if updates:
+        session.execute(update(model), updates)
+
+def _sketch_columns(sketch: Optional[QuantileSketch]) -> dict:
+    if sketch is None or sketch.count == 0:
+        return {'price_sketch': None, 'median_price': None, 'p90_price': None}
+    return {'price_sketch': sketch.to_bytes(), 'median_price': sketch.quantile(0.5), 'p90_price': sketch.quantile(0.9)}
+
+def _price_sketches(session: Session, keys: List[str], *filters) -> Dict[tuple, QuantileSketch]:
+    key_columns = [getattr(CleanedListing, key) for key in keys]
+    query = (
+        select(*key_columns, CleanedListing.price_kes)
+        .where(*filters, CleanedListing.price_kes.isnot(None), *[column.isnot(None) for column in key_columns])
+        .execution_options(yield_per=50000)
+    )
+
+    sketches = {}
+    for partition in session.execute(query).partitions():
+        prices = defaultdict(list)
+        for *key, price in partition:
+            prices[tuple(key)].append(price)
+        for key, values in prices.items():
+            sketch = QuantileSketch.from_values(values, LOADER_CONFIG['sketch_relative_accuracy'])
+            if key in sketches:
+                sketches[key].merge(sketch)
+            else:
+                sketches[key] = sketch
+    return sketches
+
+def _write_sketches(session: Session, model, keys: List[str], sketches: Dict[tuple, QuantileSketch]):
+    session.execute(update(model), [
+        {**dict(zip(keys, key)), **_sketch_columns(sketch)}
+        for key, sketch in sketches.items()
+    ])
+
+def rebuild_summaries(session: Session):
+    for model, keys in SUMMARIES:
+        session.execute(delete(model))
+        session.execute(pg_insert(model).from_select(keys + AGGREGATE_COLUMNS, _grouped_aggregates(keys)))
+        sketches = _price_sketches(session, keys)
+        if sketches:
+            _write_sketches(session, model, keys, sketches)
+    logger.info(f"Rebuilt {len(SUMMARIES)} price summary tables")
+
+def price_quantiles(session: Session, model, quantiles: List[float] = (0.5, 0.9), **key_filters) -> Dict[float, Optional[float]]:
+    # Merges the stored sketches of every matching summary row, e.g. all bedroom counts in one
+    # county, and reads the quantiles from the merged sketch
+    merged = QuantileSketch(LOADER_CONFIG['sketch_relative_accuracy'])
+    query = select(model.price_sketch).where(
+        model.price_sketch.isnot(None), *[getattr(model, key) == value for key, value in key_filters.items()]
+    )
+    for (data,) in session.execute(query):
+        merged.merge(QuantileSketch.from_bytes(data))
+    return {q: merged.quantile(q) for q in quantiles}
@@ -0,0 +1,70 @@
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import List
+from pandas.api.types import union_categoricals
+from sqlalchemy import select
+from config.database import CleanedListing, get_engine
+from config.settings import TRANSFORM_CONFIG
+from scripts.loaders.snapshot import open_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Compact dtypes for analysis. Low-cardinality text becomes category; counts fit in Int16; area is
+# a measurement where float32 is plenty. price_kes stays float64 because KES prices run past the
+# 7 significant digits float32 keeps, and sums over millions of them would drift.
+ANALYSIS_DTYPES = {
+    'source_site': 'category',
+    'county': 'category',
+    'neighborhood': 'category',
+    'property_type': 'category',
+    'bedrooms': 'Int16',
+    'bathrooms': 'Int16',
+    'area_sqm': 'float32',
+    'price_kes': 'float64',
+}
+
+ARROW_TYPES = {'Int16': pa.int16(), 'float32': pa.float32(), 'float64': pa.float64()}
+
+def to_analysis_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({column: dtype for column, dtype in ANALYSIS_DTYPES.items() if column in df.columns})
+
+def _compact_table(table: pa.Table) -> pa.Table:
+    # Converted in Arrow so category columns go straight to codes without building a Python string per row
+    for i, name in enumerate(table.column_names):
+        dtype = ANALYSIS_DTYPES.get(name)
+        if dtype == 'category':
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+        elif dtype in ARROW_TYPES:
+            table = table.set_column(i, name, table.column(i).cast(ARROW_TYPES[dtype]))
+    return table
+
+def load_listings(columns: List[str], filter: pc.Expression = None, path: str = None) -> pd.DataFrame:
+    # Reads only the requested columns (and, with a filter on the partition column, only the matching
+    # files) from the Parquet snapshot
+    table = open_snapshot(path).to_table(columns=columns, filter=filter)
+    df = _compact_table(table).to_pandas(types_mapper={pa.int16(): pd.Int16Dtype()}.get)
+    logger.info(f"Loaded {len(df)} listings ({df.memory_usage(deep=True).sum() / 1e6:.1f} MB) from the snapshot")
+    return df
+
+def query_listings(columns: List[str], *filters, chunk_size: int = None, engine=None) -> pd.DataFrame:
+    chunk_size = chunk_size or TRANSFORM_CONFIG['chunk_size']
+    query = select(*[getattr(CleanedListing, column) for column in columns]).where(*filters)
+
+    # Each chunk is compacted as it arrives, so the object-dtype rows never exist for the whole result
+    frames = []
+    with (engine or get_engine()).connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+        for partition in result.partitions(chunk_size):
+            frames.append(to_analysis_dtypes(pd.DataFrame(partition, columns=columns)))
+
+    if not frames:
+        return to_analysis_dtypes(pd.DataFrame(columns=columns))
+    df = pd.concat(frames, ignore_index=True)
+    for column in columns:
+        if ANALYSIS_DTYPES.get(column) == 'category':
+            # Chunks carry different category sets, which pd.concat would widen back to object
+            df[column] = union_categoricals([frame[column] for frame in frames])
+    logger.info(f"Loaded {len(df)} listings ({df.memory_usage(deep=True).sum() / 1e6:.1f} MB) from the database")
+    return df
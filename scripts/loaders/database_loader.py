@@ -1,21 +1,41 @@
 import pandas as pd
+import numpy as np
 import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from config.database import RawListing, CleanedListing, get_session
+from config.settings import SCRAPING_CONFIG, LOADER_CONFIG, TRANSFORM_CONFIG
+from scripts.extractors.bloom_filter import BloomFilter
+from scripts.loaders.aggregates import update_summaries, rebuild_summaries
+from scripts.loaders.fingerprint import content_hash, content_hashes
+from scripts.loaders.price_history import HISTORY_COLUMNS, append_price_history, backfill_price_history, price_changes
+from scripts.transformers.near_duplicates import NearDuplicateDetector
 from datetime import datetime
+from typing import Iterable, Iterator, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cleaned columns the price summaries are grouped by or aggregate
+SUMMARY_INPUT_COLUMNS = ['county', 'bedrooms', 'property_type', 'neighborhood', 'price_kes', 'area_sqm']
+
+# Cleaned columns a re-clean of the same listing must not overwrite; property_id is only set by
+# assign_property_ids
+PRESERVED_ON_UPDATE = {'id', 'property_id'}
+
 class DatabaseLoader:
     def __init__(self):
         self.session = get_session()
         
     def load_raw_listings(self, listings_data: list) -> int:
+        if LOADER_CONFIG['bulk_load']:
+            return self.load_raw_listings_bulk(listings_data)['inserted']
+        
         logger.info(f"Loading {len(listings_data)} raw listings to database")
         
         inserted_count = 0
+        updated_count = 0
         skipped_count = 0
         
         for listing in listings_data:
@@ -24,23 +44,17 @@ class DatabaseLoader:
                     RawListing.listing_url == listing['listing_url']
                 ).first()
                 
+                row = self._raw_listing_row(listing)
                 if existing:
-                    skipped_count += 1
+                    if existing.content_hash == row['content_hash']:
+                        skipped_count += 1
+                    else:
+                        for column, value in row.items():
+                            setattr(existing, column, value)
+                        updated_count += 1
                     continue
                 
-                raw_listing = RawListing(
-                    source_site=listing.get('source_site'),
-                    listing_url=listing.get('listing_url'),
-                    title=listing.get('title'),
-                    description=listing.get('description'),
-                    price_raw=listing.get('price_raw'),
-                    location_raw=listing.get('location_raw'),
-                    bedrooms_raw=listing.get('bedrooms_raw'),
-                    bathrooms_raw=listing.get('bathrooms_raw'),
-                    area_raw=listing.get('area_raw'),
-                    property_type_raw=listing.get('property_type_raw'),
-                    scraped_at=listing.get('scraped_at', datetime.utcnow())
-                )
+                raw_listing = RawListing(**row)
                 
                 self.session.add(raw_listing)
                 inserted_count += 1
@@ -52,18 +66,105 @@ class DatabaseLoader:
         
         try:
             self.session.commit()
-            logger.info(f"Successfully loaded {inserted_count} raw listings, skipped {skipped_count} duplicates")
+            logger.info(
+                f"Successfully loaded {inserted_count} raw listings, updated {updated_count} changed, "
+                f"skipped {skipped_count} unchanged"
+            )
         except Exception as e:
             logger.error(f"Error committing raw listings: {e}")
             self.session.rollback()
             
         return inserted_count
     
+    def load_raw_listings_bulk(self, listings_data: list, batch_size: int = None) -> dict:
+        batch_size = batch_size or LOADER_CONFIG['batch_size']
+        logger.info(f"Bulk loading {len(listings_data)} raw listings to database")
+        
+        inserted_count = 0
+        updated_count = 0
+        skipped_count = 0
+        
+        for start in range(0, len(listings_data), batch_size):
+            batch = listings_data[start:start + batch_size]
+            # The first copy of a URL wins within a batch, as it would with one insert per row
+            rows = {}
+            for listing in batch:
+                rows.setdefault(listing.get('listing_url'), self._raw_listing_row(listing))
+            rows = list(rows.values())
+            try:
+                stored_hashes = self._stored_hashes(RawListing, [row['listing_url'] for row in rows])
+                changed = [row for row in rows if stored_hashes.get(row['listing_url']) != row['content_hash']]
+                # Counts come from the rows the statement actually wrote: a row another writer stored
+                # with the same content after the lookup is left alone and counted as skipped
+                written = self.session.execute(
+                    self._upsert_changed(RawListing, changed).returning(RawListing.listing_url)
+                ).scalars().all() if changed else []
+                self.session.commit()
+            except Exception as e:
+                logger.error(f"Error bulk inserting raw listings batch at offset {start}: {e}")
+                self.session.rollback()
+                continue
+            
+            inserted = sum(1 for url in written if url not in stored_hashes)
+            inserted_count += inserted
+            updated_count += len(written) - inserted
+            skipped_count += len(batch) - len(written)
+        
+        logger.info(
+            f"Successfully loaded {inserted_count} raw listings, updated {updated_count} changed, "
+            f"skipped {skipped_count} unchanged"
+        )
+        return {'inserted': inserted_count, 'updated': updated_count, 'skipped': skipped_count}
+    
+    def _stored_hashes(self, model, urls: list) -> dict:
+        # One lookup per batch; content is compared by hash, never by fetching whole rows
+        return dict(self.session.execute(
+            select(model.listing_url, model.content_hash).where(model.listing_url.in_(urls))
+        ).all())
+    
+    def _upsert_changed(self, model, rows: list, replace: bool = False):
+        stmt = pg_insert(model).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=['listing_url'],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != 'listing_url'},
+            # Re-checked in the statement, so a row written concurrently with the same content stays untouched
+            where=None if replace else model.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        )
+    
+    def _raw_listing_row(self, listing: dict) -> dict:
+        return {
+            'source_site': listing.get('source_site'),
+            'listing_url': listing.get('listing_url'),
+            'title': listing.get('title'),
+            'description': listing.get('description'),
+            'price_raw': listing.get('price_raw'),
+            'location_raw': listing.get('location_raw'),
+            'bedrooms_raw': listing.get('bedrooms_raw'),
+            'bathrooms_raw': listing.get('bathrooms_raw'),
+            'area_raw': listing.get('area_raw'),
+            'property_type_raw': listing.get('property_type_raw'),
+            'content_hash': listing.get('content_hash') or content_hash(listing),
+            'scraped_at': listing.get('scraped_at', datetime.utcnow()),
+        }
+    
+    def load_raw_listings_stream(self, listing_batches: Iterable[list]) -> int:
+        inserted_count = 0
+        for batch in listing_batches:
+            inserted_count += self.load_raw_listings(batch)
+        return inserted_count
+    
     def load_cleaned_listings(self, df: pd.DataFrame) -> int:
+        if LOADER_CONFIG['bulk_load']:
+            return self.load_cleaned_listings_bulk(df)['inserted']
+        
         logger.info(f"Loading {len(df)} cleaned listings to database")
         
         inserted_count = 0
+        updated_count = 0
         skipped_count = 0
+        added_listings = []
+        updated_listings = []
+        previous_rows = []
         
         for _, row in df.iterrows():
             try:
@@ -71,7 +172,7 @@ class DatabaseLoader:
                     CleanedListing.listing_url == row['listing_url']
                 ).first()
                 
-                if existing:
+                if existing and (existing.content_hash == row.get('content_hash') or pd.isna(row.get('content_hash'))):
                     skipped_count += 1
                     continue
                 
@@ -94,11 +195,24 @@ class DatabaseLoader:
                     bathrooms=int(row['bathrooms']) if pd.notna(row.get('bathrooms')) else None,
                     area_sqm=float(row['area_sqm']) if pd.notna(row.get('area_sqm')) else None,
                     property_type=row.get('property_type'),
+                    content_hash=row.get('content_hash'),
                     scraped_at=row.get('scraped_at', datetime.utcnow()),
                     cleaned_at=datetime.utcnow()
                 )
                 
+                if existing:
+                    previous_rows.append({
+                        key: getattr(existing, key) for key in SUMMARY_INPUT_COLUMNS
+                    })
+                    for column in CleanedListing.__table__.columns.keys():
+                        if column not in PRESERVED_ON_UPDATE:
+                            setattr(existing, column, getattr(cleaned_listing, column))
+                    updated_listings.append(existing)
+                    updated_count += 1
+                    continue
+                
                 self.session.add(cleaned_listing)
+                added_listings.append(cleaned_listing)
                 inserted_count += 1
                 
             except Exception as e:
@@ -107,14 +221,246 @@ class DatabaseLoader:
                 continue
         
         try:
+            if LOADER_CONFIG['refresh_summaries']:
+                self.session.flush()
+                update_summaries(
+                    self.session, [listing.id for listing in added_listings],
+                    [listing.id for listing in updated_listings], previous_rows,
+                )
+            if LOADER_CONFIG['record_price_history']:
+                append_price_history(self.session, [
+                    {column: getattr(listing, column) for column in HISTORY_COLUMNS}
+                    for listing in added_listings + updated_listings
+                ])
             self.session.commit()
-            logger.info(f"Successfully loaded {inserted_count} cleaned listings, skipped {skipped_count} duplicates")
+            logger.info(
+                f"Successfully loaded {inserted_count} cleaned listings, updated {updated_count} changed, "
+                f"skipped {skipped_count} unchanged"
+            )
         except Exception as e:
             logger.error(f"Error committing cleaned listings: {e}")
             self.session.rollback()
             
         return inserted_count
     
+    def load_cleaned_listings_bulk(self, df: pd.DataFrame, batch_size: int = None, replace: bool = False) -> dict:
+        batch_size = batch_size or LOADER_CONFIG['batch_size']
+        logger.info(f"Bulk loading {len(df)} cleaned listings to database")
+        
+        records = self._cleaned_listing_frame(df)
+        inserted_count = 0
+        updated_count = 0
+        skipped_count = 0
+        unmatched_count = 0
+        
+        for start in range(0, len(records), batch_size):
+            batch = records.iloc[start:start + batch_size]
+            try:
+                # One lookup per batch resolves raw_listing_id for every row in it
+                raw_ids = dict(self.session.execute(
+                    select(RawListing.listing_url, RawListing.id)
+                    .where(RawListing.listing_url.in_(batch['listing_url'].tolist()))
+                ).all())
+                batch = batch.assign(raw_listing_id=batch['listing_url'].map(raw_ids).astype('Int64'))
+                
+                matched = batch['raw_listing_id'].notna()
+                unmatched_count += int((~matched).sum())
+                batch = batch[matched]
+                if batch.empty:
+                    continue
+                
+                rows = batch.astype(object).where(batch.notna(), None).to_dict('records')
+                
+                # Summary inputs of the stored rows, so an update can be subtracted from the groups it leaves
+                stored = {
+                    row['listing_url']: row for row in self.session.execute(
+                        select(
+                            CleanedListing.listing_url, CleanedListing.content_hash,
+                            *[getattr(CleanedListing, column) for column in SUMMARY_INPUT_COLUMNS],
+                        ).where(CleanedListing.listing_url.in_(batch['listing_url'].tolist()))
+                    ).mappings()
+                }
+                # Re-cleaning overwrites every stored row; otherwise only new rows and rows whose raw
+                # content changed are written. Rows without a hash can't be compared and are left alone.
+                rows = [
+                    row for row in rows
+                    if row['listing_url'] not in stored
+                    or replace
+                    or (row['content_hash'] is not None and stored[row['listing_url']]['content_hash'] != row['content_hash'])
+                ]
+                if not rows:
+                    skipped_count += len(batch)
+                    continue
+                
+                stmt = self._upsert_changed(CleanedListing, rows, replace=replace).returning(
+                    CleanedListing.id, CleanedListing.listing_url
+                )
+                written = self.session.execute(stmt).all()
+                inserted_ids = [listing_id for listing_id, url in written if url not in stored]
+                updated_ids = [listing_id for listing_id, url in written if url in stored]
+                # Summaries are updated in the same transaction; a re-clean rebuilds them once at the end
+                if LOADER_CONFIG['refresh_summaries'] and not replace:
+                    update_summaries(
+                        self.session, inserted_ids, updated_ids, [stored[url] for _, url in written if url in stored]
+                    )
+                if LOADER_CONFIG['record_price_history']:
+                    written_urls = {url for _, url in written}
+                    append_price_history(self.session, [row for row in rows if row['listing_url'] in written_urls])
+                self.session.commit()
+            except Exception as e:
+                logger.error(f"Error bulk inserting cleaned listings batch at offset {start}: {e}")
+                self.session.rollback()
+                continue
+            
+            inserted_count += len(inserted_ids)
+            updated_count += len(updated_ids)
+            skipped_count += len(batch) - len(written)
+        
+        if unmatched_count:
+            logger.warning(f"Skipped {unmatched_count} cleaned listings with no matching raw listing")
+        logger.info(
+            f"Successfully loaded {inserted_count} cleaned listings, updated {updated_count} changed, "
+            f"skipped {skipped_count} unchanged"
+        )
+        return {'inserted': inserted_count, 'updated': updated_count, 'skipped': skipped_count, 'unmatched': unmatched_count}
+    
+    def load_cleaned_listings_stream(self, frames: Iterable[pd.DataFrame], replace: bool = False) -> dict:
+        totals = {'inserted': 0, 'updated': 0, 'skipped': 0, 'unmatched': 0}
+        for df in frames:
+            result = self.load_cleaned_listings_bulk(df, replace=replace)
+            for key in totals:
+                totals[key] += result[key]
+        return totals
+    
+    def rebuild_summaries(self):
+        try:
+            rebuild_summaries(self.session)
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Error rebuilding price summaries: {e}")
+            self.session.rollback()
+            raise
+    
+    def iter_raw_listings(self, chunk_size: int = None, source_site: Optional[str] = None) -> Iterator[list]:
+        chunk_size = chunk_size or TRANSFORM_CONFIG['chunk_size']
+        columns = [column for column in RawListing.__table__.columns if column.name != 'id']
+        query = select(*columns).order_by(RawListing.id)
+        if source_site:
+            query = query.where(RawListing.source_site == source_site)
+        
+        # A separate connection with a server-side cursor, so only one chunk is held in memory
+        # and commits made by the loading session do not close the cursor
+        with self.session.get_bind().connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+            for partition in result.mappings().partitions(chunk_size):
+                yield [dict(row) for row in partition]
+    
+    def _cleaned_listing_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.reindex(columns=[
+            'source_site', 'listing_url', 'title', 'description', 'price_kes', 'county', 'neighborhood',
+            'bedrooms', 'bathrooms', 'area_sqm', 'property_type', 'content_hash', 'scraped_at',
+        ])
+        df = df.dropna(subset=['listing_url']).drop_duplicates(subset=['listing_url'], keep='first')
+        
+        return df.assign(
+            price_kes=pd.to_numeric(df['price_kes'], errors='coerce').astype('float64'),
+            bedrooms=pd.to_numeric(df['bedrooms'], errors='coerce').round().astype('Int64'),
+            bathrooms=pd.to_numeric(df['bathrooms'], errors='coerce').round().astype('Int64'),
+            area_sqm=pd.to_numeric(df['area_sqm'], errors='coerce').astype('float64'),
+            scraped_at=pd.to_datetime(df['scraped_at'], errors='coerce').fillna(pd.Timestamp(datetime.utcnow())),
+            cleaned_at=datetime.utcnow(),
+        )
+    
+    def changed_listings(self, df: pd.DataFrame, batch_size: int = None) -> pd.DataFrame:
+        # Raw listings whose content differs from what their cleaned row was built from, plus new
+        # ones; only these need to go through the transformer again
+        batch_size = batch_size or LOADER_CONFIG['batch_size']
+        df = df.assign(content_hash=content_hashes(df))
+        stored_hashes = {}
+        for start in range(0, len(df), batch_size):
+            stored_hashes.update(self._stored_hashes(CleanedListing, df['listing_url'].iloc[start:start + batch_size].tolist()))
+        
+        changed = df[df['listing_url'].map(stored_hashes) != df['content_hash']]
+        logger.info(f"{len(changed)} of {len(df)} listings are new or changed since they were last cleaned")
+        return changed
+    
+    def assign_property_ids(self, detector: NearDuplicateDetector = None, chunk_size: int = None) -> dict:
+        # Near-duplicate detection over every cleaned listing, so a listing posted today on one site
+        # joins the property it was posted as before on another. Only the signatures and a few
+        # columns are kept; descriptions are read a chunk at a time.
+        detector = detector or NearDuplicateDetector()
+        chunk_size = chunk_size or TRANSFORM_CONFIG['chunk_size']
+        columns = ['id', 'title', 'description', 'price_kes', 'county', 'property_id']
+        query = select(*[getattr(CleanedListing, column) for column in columns]).order_by(CleanedListing.id)
+        
+        signatures, metadata = [], []
+        with self.session.get_bind().connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+            for partition in result.partitions(chunk_size):
+                chunk = pd.DataFrame(partition, columns=columns)
+                signatures.append(detector.signatures(chunk))
+                metadata.append(chunk[['id', 'price_kes', 'county', 'property_id']])
+        
+        if not metadata:
+            return {'listings': 0, 'properties': 0, 'updated': 0}
+        listings = pd.concat(metadata, ignore_index=True)
+        labels = detector.cluster(
+            np.concatenate(signatures), listings['price_kes'].to_numpy(dtype=np.float64), listings['county'].to_numpy()
+        )
+        # Rows are in id order, so each property is named after its oldest listing
+        property_ids = listings['id'].to_numpy()[labels]
+        changed = listings[listings['property_id'].to_numpy(dtype=np.float64) != property_ids]
+        
+        try:
+            if len(changed):
+                self.session.execute(update(CleanedListing), [
+                    {'id': int(listing_id), 'property_id': int(property_id)}
+                    for listing_id, property_id in zip(changed['id'], property_ids[changed.index])
+                ])
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Error assigning property ids: {e}")
+            self.session.rollback()
+            raise
+        
+        result = {'listings': len(listings), 'properties': int(len(np.unique(labels))), 'updated': len(changed)}
+        logger.info(
+            f"Grouped {result['listings']} cleaned listings into {result['properties']} properties, "
+            f"updated {result['updated']} property ids"
+        )
+        return result
+    
+    def backfill_price_history(self) -> int:
+        try:
+            count = backfill_price_history(self.session)
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Error backfilling price history: {e}")
+            self.session.rollback()
+            raise
+        logger.info(f"Backfilled price history for {count} listings")
+        return count
+    
+    def get_price_changes(self, days: int = 90, county: Optional[str] = None, neighborhood: Optional[str] = None,
+                          drops_only: bool = True) -> list:
+        return price_changes(self.session, days=days, county=county, neighborhood=neighborhood, drops_only=drops_only)
+    
+    def get_known_listing_urls(self, source_site: str):
+        count = self.session.query(RawListing).filter(RawListing.source_site == source_site).count()
+        urls = (
+            url for (url,) in self.session.query(RawListing.listing_url)
+            .filter(RawListing.source_site == source_site)
+            .yield_per(10000)
+        )
+
+        # Large histories are held as a Bloom filter; a false positive only ends a crawl slightly early
+        if count > SCRAPING_CONFIG['bloom_filter_threshold']:
+            logger.info(f"Loading {count} known URLs for {source_site} into a Bloom filter")
+            return BloomFilter.from_iterable(urls, capacity=count)
+
+        logger.info(f"Loaded {count} known URLs for {source_site}")
+        return set(urls)
+    
     def get_statistics(self) -> dict:
         try:
             raw_count = self.session.query(RawListing).count()
@@ -133,4 +479,11 @@ class DatabaseLoader:
             return {}
     
     def close(self):
-        self.session.close()
\ No newline at end of file
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Hands the connection back to the shared pool as soon as the block ends
+        self.close()
\ No newline at end of file
@@ -0,0 +1,26 @@
+import hashlib
+import pandas as pd
+
+# Scraped fields that define a listing's content; scraped_at and the URL are left out so an
+# unchanged re-scrape hashes the same
+HASHED_FIELDS = [
+    'title', 'description', 'price_raw', 'location_raw', 'bedrooms_raw',
+    'bathrooms_raw', 'area_raw', 'property_type_raw',
+]
+
+def _normalize(value) -> str:
+    # Missing values hash differently from empty strings
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return '\x00'
+    return str(value).strip()
+
+def _hash_values(values) -> str:
+    payload = '\x1f'.join(_normalize(value) for value in values)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def content_hash(listing: dict) -> str:
+    return _hash_values(listing.get(field) for field in HASHED_FIELDS)
+
+def content_hashes(df: pd.DataFrame) -> pd.Series:
+    columns = [df[field] if field in df.columns else pd.Series(None, index=df.index, dtype=object) for field in HASHED_FIELDS]
+    return pd.Series([_hash_values(values) for values in zip(*columns)], index=df.index, dtype=object)
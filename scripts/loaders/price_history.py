@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import exists, func, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from config.database import CleanedListing, ListingPriceHistory
+
+HISTORY_COLUMNS = ['listing_url', 'scraped_at', 'source_site', 'county', 'neighborhood', 'price_kes']
+
+def append_price_history(session: Session, rows: List[dict]) -> int:
+    # Takes a whole night's rows at once; a retried load re-appends the same (listing, scrape time)
+    # points, which the primary key turns into no-ops
+    rows = [
+        {column: row.get(column) for column in HISTORY_COLUMNS}
+        for row in rows
+        if row.get('price_kes') is not None and row.get('scraped_at') is not None
+    ]
+    if not rows:
+        return 0
+
+    # A parameter list rather than .values(rows): the statement is compiled once and sent as
+    # multi-row VALUES pages, several times faster than building one statement per batch
+    stmt = (
+        pg_insert(ListingPriceHistory)
+        .on_conflict_do_nothing(index_elements=['listing_url', 'scraped_at'])
+        .returning(ListingPriceHistory.listing_url)
+    )
+    return len(session.execute(stmt, rows).all())
+
+def backfill_price_history(session: Session) -> int:
+    # One-off seeding for listings cleaned before the history existed: each listing with no history
+    # yet gets its current price as of its last scrape, the time every other point is keyed by
+    observed_at = func.coalesce(CleanedListing.scraped_at, CleanedListing.cleaned_at)
+    source = select(
+        CleanedListing.listing_url, observed_at, CleanedListing.source_site,
+        CleanedListing.county, CleanedListing.neighborhood, CleanedListing.price_kes,
+    ).where(
+        CleanedListing.price_kes.isnot(None),
+        observed_at.isnot(None),
+        ~exists().where(ListingPriceHistory.listing_url == CleanedListing.listing_url),
+    )
+    stmt = (
+        pg_insert(ListingPriceHistory)
+        .from_select(HISTORY_COLUMNS, source)
+        .on_conflict_do_nothing(index_elements=['listing_url', 'scraped_at'])
+    )
+    return session.execute(stmt).rowcount
+
+def price_changes(
+    session: Session,
+    days: int = 90,
+    county: Optional[str] = None,
+    neighborhood: Optional[str] = None,
+    drops_only: bool = True,
+) -> List[dict]:
+    # Points scraped in the window come from the BRIN index; each one's previous price, which may be
+    # older than the window, is a single backward step along the primary key
+    since = datetime.utcnow() - timedelta(days=days)
+    current = aliased(ListingPriceHistory, name='current')
+    previous = aliased(ListingPriceHistory, name='previous')
+
+    previous_point = (
+        select(previous.price_kes.label('previous_price'), previous.scraped_at.label('previous_scraped_at'))
+        .where(previous.listing_url == current.listing_url, previous.scraped_at < current.scraped_at)
+        .order_by(previous.scraped_at.desc())
+        .limit(1)
+        .lateral('previous_point')
+    )
+
+    filters = [current.scraped_at >= since]
+    if county:
+        filters.append(current.county == county)
+    if neighborhood:
+        filters.append(current.neighborhood == neighborhood)
+    if drops_only:
+        filters.append(current.price_kes < previous_point.c.previous_price)
+    else:
+        filters.append(current.price_kes != previous_point.c.previous_price)
+
+    change = current.price_kes - previous_point.c.previous_price
+    change_pct = change * 100.0 / previous_point.c.previous_price
+    query = (
+        select(
+            current.listing_url, current.source_site, current.county, current.neighborhood,
+            previous_point.c.previous_price, current.price_kes.label('price'),
+            change.label('change'), change_pct.label('change_pct'),
+            previous_point.c.previous_scraped_at, current.scraped_at,
+        )
+        .select_from(current)
+        .join(previous_point, true())
+        .where(*filters)
+        .order_by(change_pct)
+    )
+    return [dict(row) for row in session.execute(query).mappings()]
@@ -0,0 +1,109 @@
+import math
+import struct
+import numpy as np
+from typing import Iterable
+
+class QuantileSketch:
+    # Relative-error quantile sketch (DDSketch). Positive values are counted in logarithmic
+    # buckets, so any quantile estimate is within relative_accuracy of a true value at that rank.
+    # Merging adds bucket counts, which gives the same sketch in any order across sites and batches.
+    _HEADER = struct.Struct('<dqqddq')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], relative_accuracy: float = 0.01) -> 'QuantileSketch':
+        sketch = cls(relative_accuracy)
+        sketch.add_many(values)
+        return sketch
+
+    def add_many(self, values: Iterable[float]):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def add(self, value: float):
+        self.add_many([value])
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def subtract(self, other: 'QuantileSketch'):
+        # Removes values that were added earlier. min and max can't be narrowed from the buckets, so
+        # callers rebuild the sketch when an extreme value is removed.
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot subtract sketches with different relative accuracy")
+        for key, count in other.buckets.items():
+            remaining = self.buckets.get(key, 0) - count
+            if remaining > 0:
+                self.buckets[key] = remaining
+            else:
+                self.buckets.pop(key, None)
+        self.zero_count = max(0, self.zero_count - other.zero_count)
+        self.count = max(0, self.count - other.count)
+
+    def quantile(self, q: float):
+        if self.count == 0:
+            return None
+
+        # Walks at most one entry per bucket, independent of how many values were added
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return max(0.0, self.min)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_bytes(self) -> bytes:
+        keys = np.fromiter(self.buckets.keys(), dtype=np.int32, count=len(self.buckets))
+        counts = np.fromiter(self.buckets.values(), dtype=np.int64, count=len(self.buckets))
+        header = self._HEADER.pack(self.relative_accuracy, self.count, self.zero_count, self.min, self.max, len(keys))
+        return header + keys.tobytes() + counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'QuantileSketch':
+        relative_accuracy, count, zero_count, minimum, maximum, size = cls._HEADER.unpack_from(data)
+        offset = cls._HEADER.size
+        keys = np.frombuffer(data, dtype=np.int32, count=size, offset=offset)
+        counts = np.frombuffer(data, dtype=np.int64, count=size, offset=offset + 4 * size)
+
+        sketch = cls(relative_accuracy)
+        sketch.buckets = dict(zip(keys.tolist(), counts.tolist()))
+        sketch.count = count
+        sketch.zero_count = zero_count
+        sketch.min = minimum
+        sketch.max = maximum
+        return sketch
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,101 @@
+import os
+import glob
+import shutil
+import logging
+import pyarrow as pa
+import pyarrow.dataset as ds
+from typing import Iterator
+from sqlalchemy import select, func
+from config.database import CleanedListing, get_engine
+from config.settings import SNAPSHOT_CONFIG, TRANSFORM_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ('id', pa.int32()),
+    ('source_site', pa.string()),
+    ('listing_url', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('price_kes', pa.float64()),
+    ('county', pa.string()),
+    ('neighborhood', pa.string()),
+    ('bedrooms', pa.int32()),
+    ('bathrooms', pa.int32()),
+    ('area_sqm', pa.float64()),
+    ('property_type', pa.string()),
+    ('property_id', pa.int32()),
+    ('scraped_at', pa.timestamp('us')),
+    ('cleaned_at', pa.timestamp('us')),
+])
+
+PARTITION_COLUMNS = {
+    'county': pa.field('county', pa.string()),
+    'scrape_date': pa.field('scrape_date', pa.date32()),
+}
+
+def _snapshot_schema(partition_by: str) -> pa.Schema:
+    if partition_by not in PARTITION_COLUMNS:
+        raise ValueError(f"Unknown snapshot partition column: {partition_by}")
+    if partition_by in SNAPSHOT_SCHEMA.names:
+        return SNAPSHOT_SCHEMA
+    return SNAPSHOT_SCHEMA.append(PARTITION_COLUMNS[partition_by])
+
+def _iter_batches(engine, schema: pa.Schema, chunk_size: int) -> Iterator[pa.RecordBatch]:
+    columns = [getattr(CleanedListing, name) for name in SNAPSHOT_SCHEMA.names]
+    if 'scrape_date' in schema.names:
+        columns.append(func.date(CleanedListing.scraped_at).label('scrape_date'))
+    query = select(*columns).order_by(CleanedListing.id)
+
+    # Server-side cursor, so the export holds one chunk at a time whatever the table size
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+        for partition in result.partitions(chunk_size):
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*partition), schema)],
+                schema=schema,
+            )
+
+def export_cleaned_listings(path: str = None, partition_by: str = None, chunk_size: int = None, engine=None) -> str:
+    path = path or SNAPSHOT_CONFIG['dir']
+    partition_by = partition_by or SNAPSHOT_CONFIG['partition_by']
+    chunk_size = chunk_size or TRANSFORM_CONFIG['chunk_size']
+    schema = _snapshot_schema(partition_by)
+
+    # Written next to the live snapshot and swapped in at the end, so readers never see a partial export
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        _iter_batches(engine or get_engine(), schema, chunk_size),
+        tmp_path,
+        schema=schema,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([PARTITION_COLUMNS[partition_by]]), flavor='hive'),
+        file_options=ds.ParquetFileFormat().make_write_options(compression=SNAPSHOT_CONFIG['compression']),
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+    old_path = f"{path}.old"
+    # Left behind by an export that died mid-swap; os.replace can't move onto a non-empty directory
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+    files = glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True)
+    logger.info(
+        f"Exported cleaned_listings snapshot partitioned by {partition_by} to {path} "
+        f"({len(files)} files, {sum(os.path.getsize(f) for f in files)} bytes)"
+    )
+    return path
+
+def open_snapshot(path: str = None) -> ds.Dataset:
+    path = path or SNAPSHOT_CONFIG['dir']
+    # Typed from the partition directory names, so scrape_date reads back as a date rather than a string
+    keys = {name.split('=', 1)[0] for name in os.listdir(path) if '=' in name}
+    partitioning = ds.partitioning(pa.schema([PARTITION_COLUMNS[key] for key in keys]), flavor='hive')
+    return ds.dataset(path, format='parquet', partitioning=partitioning)
+
+def snapshot_glob(path: str = None) -> str:
+    return os.path.join(path or SNAPSHOT_CONFIG['dir'], '**', '*.parquet')
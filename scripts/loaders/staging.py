@@ -0,0 +1,52 @@
+import os
+import re
+import shutil
+import logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import List
+from config.settings import STAGING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+LISTING_SCHEMA = pa.schema([
+    ('source_site', pa.string()),
+    ('listing_url', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('price_raw', pa.string()),
+    ('location_raw', pa.string()),
+    ('bedrooms_raw', pa.string()),
+    ('bathrooms_raw', pa.string()),
+    ('area_raw', pa.string()),
+    ('property_type_raw', pa.string()),
+    ('scraped_at', pa.timestamp('us')),
+])
+
+def run_dir(run_id: str) -> str:
+    # Airflow run ids contain ':' and '+', which are awkward in directory names
+    return os.path.join(STAGING_CONFIG['dir'], re.sub(r'[^A-Za-z0-9_.-]', '_', run_id))
+
+def write_listings(listings: list, name: str, run_id: str) -> str:
+    os.makedirs(run_dir(run_id), exist_ok=True)
+    path = os.path.join(run_dir(run_id), f"{name}.parquet")
+    table = pa.Table.from_pylist(
+        [{field: listing.get(field) for field in LISTING_SCHEMA.names} for listing in listings],
+        schema=LISTING_SCHEMA,
+    )
+
+    # Written under a temporary name first so a retried task never leaves a half-written file behind
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression=STAGING_CONFIG['compression'])
+    os.replace(tmp_path, path)
+    logger.info(f"Staged {table.num_rows} listings to {path} ({os.path.getsize(path)} bytes)")
+    return path
+
+def read_listings(paths: List[str]) -> pa.Table:
+    tables = [pq.read_table(path, memory_map=True) for path in paths if path]
+    if not tables:
+        return LISTING_SCHEMA.empty_table()
+    return pa.concat_tables(tables)
+
+def remove_run(run_id: str):
+    shutil.rmtree(run_dir(run_id), ignore_errors=True)
@@ -0,0 +1,34 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.loaders import DatabaseLoader
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='List listing price changes recorded in listing_price_history')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--county')
+    parser.add_argument('--neighborhood')
+    parser.add_argument('--all-changes', action='store_true', help='Include price rises, not only drops')
+    args = parser.parse_args()
+
+    with DatabaseLoader() as loader:
+        changes = loader.get_price_changes(
+            days=args.days, county=args.county, neighborhood=args.neighborhood, drops_only=not args.all_changes,
+        )
+
+    for change in changes:
+        logger.info(
+            f"{change['scraped_at']:%Y-%m-%d} {change['listing_url']}: KES {change['previous_price']:,.0f} -> "
+            f"{change['price']:,.0f} ({change['change_pct']:+.1f}%)"
+        )
+    logger.info(f"{len(changes)} price changes in the last {args.days} days")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.extractors import SCRAPERS
+from scripts.loaders.database_loader import DatabaseLoader
+from config.settings import SITE_CONFIGS
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import json
+import time
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def enabled_sites() -> list:
+    return [site for site, config in SITE_CONFIGS.items() if config.get('enabled') and site in SCRAPERS]
+
+def run_site(site_name: str, max_pages: int, on_page=None, incremental: bool = False) -> dict:
+    started = time.perf_counter()
+    listings = []
+    try:
+        scraper = SCRAPERS[site_name]()
+        if incremental:
+            with DatabaseLoader() as loader:
+                scraper.known_urls = loader.get_known_listing_urls(site_name)
+
+        for page_listings in scraper.iter_pages(max_pages=max_pages):
+            listings.extend(page_listings)
+            if on_page and page_listings:
+                on_page(page_listings)
+    except Exception as e:
+        logger.error(f"Error extracting {site_name}: {e}")
+    elapsed = time.perf_counter() - started
+
+    return {
+        'site': site_name,
+        'listings': listings,
+        'wall_time': elapsed,
+        'listings_per_second': len(listings) / elapsed if elapsed > 0 else 0.0,
+    }
+
+def run_all_sites(max_pages: int = 5, output_path: str = None, incremental: bool = False) -> list:
+    sites = enabled_sites()
+    logger.info(f"Extracting {len(sites)} sites in parallel: {', '.join(sites)}")
+
+    started = time.perf_counter()
+    all_listings = []
+    results = []
+    output = open(output_path, 'w', encoding='utf-8') if output_path else None
+    output_lock = threading.Lock()
+
+    def write_page(page_listings: list):
+        # Pages from every site are appended as they are parsed, not when the site finishes
+        with output_lock:
+            for listing in page_listings:
+                output.write(json.dumps(listing, default=str) + '\n')
+            output.flush()
+
+    try:
+        # Every site gets its own worker, so the total is bounded by the slowest site
+        with ThreadPoolExecutor(max_workers=max(len(sites), 1)) as executor:
+            futures = [
+                executor.submit(run_site, site, max_pages, write_page if output else None, incremental)
+                for site in sites
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                all_listings.extend(result['listings'])
+
+                logger.info(
+                    f"{result['site']}: {len(result['listings'])} listings in {result['wall_time']:.1f}s "
+                    f"({result['listings_per_second']:.2f} listings/s)"
+                )
+    finally:
+        if output:
+            output.close()
+
+    total_time = time.perf_counter() - started
+
+    logger.info(f"\n{'='*50}")
+    logger.info("Extraction Summary")
+    logger.info(f"{'='*50}")
+    for result in sorted(results, key=lambda r: r['wall_time'], reverse=True):
+        logger.info(
+            f"{result['site']}: {len(result['listings'])} listings, "
+            f"{result['wall_time']:.1f}s, {result['listings_per_second']:.2f} listings/s"
+        )
+    logger.info(f"\nTotal listings extracted: {len(all_listings)} in {total_time:.1f}s")
+
+    return all_listings
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract listings from every enabled site in parallel')
+    parser.add_argument('--max-pages', type=int, default=5)
+    parser.add_argument('--output', help='Write merged listings to this JSON Lines file')
+    parser.add_argument('--incremental', action='store_true', help='Stop paginating once pages are mostly already loaded')
+    args = parser.parse_args()
+
+    run_all_sites(max_pages=args.max_pages, output_path=args.output, incremental=args.incremental)
+
+if __name__ == "__main__":
+    main()
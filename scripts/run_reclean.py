@@ -0,0 +1,63 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.transformers import DataTransformer
+from scripts.loaders import DatabaseLoader
+from config.settings import LOADER_CONFIG
+import argparse
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def reclean_raw_listings(chunk_size: int = None, source_site: str = None, replace: bool = True, workers: int = None,
+                         refresh_summaries: bool = True) -> dict:
+    # Streams raw_listings chunk by chunk through the transformer and loader, so memory use
+    # depends on the chunk size rather than on the size of the table. Callers re-cleaning several
+    # sites in parallel pass refresh_summaries=False and rebuild the summaries once afterwards.
+    started = time.perf_counter()
+    transformer = DataTransformer(workers=workers)
+    try:
+        with DatabaseLoader() as loader:
+            frames = transformer.transform_stream(loader.iter_raw_listings(chunk_size, source_site=source_site))
+            totals = loader.load_cleaned_listings_stream(frames, replace=replace)
+            if replace and refresh_summaries and LOADER_CONFIG['refresh_summaries']:
+                loader.rebuild_summaries()
+    finally:
+        transformer.close()
+
+    logger.info(
+        f"Re-cleaned raw listings in {time.perf_counter() - started:.1f}s: "
+        f"{totals['inserted']} inserted, {totals['updated']} updated, {totals['skipped']} skipped, {totals['unmatched']} unmatched"
+    )
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run the transformer over raw_listings in fixed-size chunks')
+    parser.add_argument('--chunk-size', type=int, help='Rows per chunk (defaults to TRANSFORM_CHUNK_SIZE)')
+    parser.add_argument('--source-site', help='Only re-clean listings from this site')
+    parser.add_argument('--workers', type=int, help='Transform worker processes (defaults to TRANSFORM_WORKERS, 0 for every core)')
+    parser.add_argument('--summaries-only', action='store_true', help='Only rebuild the price summary tables from cleaned_listings')
+    parser.add_argument('--backfill-price-history', action='store_true',
+                        help='Only seed listing_price_history with the current price of listings that have no history')
+    parser.add_argument('--keep-existing', action='store_true', help='Only add missing cleaned listings instead of overwriting them')
+    args = parser.parse_args()
+
+    if args.backfill_price_history:
+        with DatabaseLoader() as loader:
+            loader.backfill_price_history()
+        return
+
+    if args.summaries_only:
+        with DatabaseLoader() as loader:
+            loader.rebuild_summaries()
+        return
+
+    reclean_raw_listings(chunk_size=args.chunk_size, source_site=args.source_site, replace=not args.keep_existing,
+                         workers=args.workers)
+
+if __name__ == "__main__":
+    main()
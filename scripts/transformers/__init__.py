@@ -0,0 +1 @@
+from .data_transformer import DataTransformer
\ No newline at end of file
@@ -1,38 +1,156 @@
 import pandas as pd
+import numpy as np
+import os
 import re
 import logging
-from typing import Optional
-from config.settings import LOCATION_MAPPINGS, PROPERTY_TYPE_MAPPINGS, KENYAN_COUNTIES
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Iterable, Iterator
+from config.settings import LOCATION_MAPPINGS, PROPERTY_TYPE_MAPPINGS, KENYAN_COUNTIES, TRANSFORM_CONFIG
+from scripts.transformers import vectorized
+from scripts.transformers.matcher import compile_patterns
+from scripts.transformers.parse_cache import ParseCache, to_series, split_pairs
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_worker_transformer = None
+
+def _init_worker(engine: str):
+    global _worker_transformer
+    # Matchers and parse caches are built once per worker process and reused for every partition
+    _worker_transformer = DataTransformer(engine=engine, workers=1)
+
+def _transform_in_worker(df: pd.DataFrame) -> pd.DataFrame:
+    return _worker_transformer.transform_listings(df)
+
 class DataTransformer:
-    def __init__(self):
+    def __init__(self, engine: Optional[str] = None, workers: Optional[int] = None):
         self.location_mappings = LOCATION_MAPPINGS
         self.property_type_mappings = PROPERTY_TYPE_MAPPINGS
         self.kenyan_counties = KENYAN_COUNTIES
+        self.engine = engine or TRANSFORM_CONFIG['engine']
+        workers = TRANSFORM_CONFIG['workers'] if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self.location_matcher = compile_patterns(self.location_mappings)
+        self.county_matcher = compile_patterns(county.lower() for county in self.kenyan_counties)
+        self.property_type_matcher = compile_patterns(self.property_type_mappings)
+        self.parse_caches = {
+            name: ParseCache(TRANSFORM_CONFIG['parse_cache_size'])
+            for name in ['price', 'location', 'number', 'area', 'property_type']
+        }
         
     def transform_listings(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info(f"Starting transformation of {len(df)} listings")
         
-        df['price_kes'] = df['price_raw'].apply(self._parse_price)
-        
-        location_info = df['location_raw'].apply(self._parse_location)
-        df['county'] = location_info.apply(lambda x: x['county'])
-        df['neighborhood'] = location_info.apply(lambda x: x['neighborhood'])
+        chunk_size = TRANSFORM_CONFIG['chunk_size']
+        if self.workers > 1 and len(df) > chunk_size:
+            partition_count = min(-(-len(df) // chunk_size), self.workers * 4)
+            partitions = [df.iloc[rows] for rows in np.array_split(np.arange(len(df)), partition_count)]
+            # map() returns partitions in submission order, so the result matches a serial run
+            results = list(self._process_pool().map(_transform_in_worker, partitions))
+            df = pd.concat([result for result in results if len(result)] or results[:1])
+            logger.info(f"Transformation complete. {len(df)} listings after cleaning ({self.workers} workers)")
+            return df
         
-        df['bedrooms'] = df['bedrooms_raw'].apply(self._parse_number)
-        df['bathrooms'] = df['bathrooms_raw'].apply(self._parse_number)
-        df['area_sqm'] = df['area_raw'].apply(self._parse_area)
-        df['property_type'] = df['property_type_raw'].apply(self._standardize_property_type)
+        if self.engine == 'vectorized':
+            self._parse_columns_vectorized(df)
+        else:
+            self._parse_columns_apply(df)
         
         df = df.dropna(subset=['price_kes'])
         df = df[df['price_kes'] > 0]
         
-        logger.info(f"Transformation complete. {len(df)} listings after cleaning")
+        hit_rates = ', '.join(f"{name} {stats['hit_rate']:.0%}" for name, stats in self.parse_cache_stats().items())
+        logger.info(f"Transformation complete. {len(df)} listings after cleaning (parse cache hit rate: {hit_rates})")
         return df
     
+    def _parse_columns_vectorized(self, df: pd.DataFrame):
+        # Rows the Arrow kernels cannot handle exactly fall back to the per-row parsers
+        self._assign_parsed(df, {
+            'price': lambda values: vectorized.parse_price(values, self._parse_price).tolist(),
+            'location': lambda values: list(zip(*vectorized.parse_location(
+                values, self.location_mappings, self.location_matcher,
+                self.kenyan_counties, self.county_matcher, self._parse_location
+            ))),
+            'number': lambda values: vectorized.parse_number(values, self._parse_number).tolist(),
+            'area': lambda values: vectorized.parse_area(values, self._parse_area).tolist(),
+            'property_type': lambda values: vectorized.standardize_property_type(
+                values, self.property_type_mappings, self.property_type_matcher,
+                self._standardize_property_type
+            ).tolist(),
+        })
+    
+    def _parse_columns_apply(self, df: pd.DataFrame):
+        self._assign_parsed(df, {
+            'price': lambda values: [self._parse_price(value) for value in values],
+            'location': lambda values: [
+                (location['county'], location['neighborhood'])
+                for location in map(self._parse_location, values)
+            ],
+            'number': lambda values: [self._parse_number(value) for value in values],
+            'area': lambda values: [self._parse_area(value) for value in values],
+            'property_type': lambda values: [self._standardize_property_type(value) for value in values],
+        })
+    
+    def _assign_parsed(self, df: pd.DataFrame, parsers: dict):
+        # Each distinct raw string is parsed once; repeats are served from the bounded caches
+        caches = self.parse_caches
+        df['price_kes'] = to_series(caches['price'].map(df['price_raw'], parsers['price']), df.index)
+        df['county'], df['neighborhood'] = split_pairs(
+            caches['location'].map(df['location_raw'], parsers['location']), df.index
+        )
+        df['bedrooms'] = to_series(caches['number'].map(df['bedrooms_raw'], parsers['number']), df.index)
+        df['bathrooms'] = to_series(caches['number'].map(df['bathrooms_raw'], parsers['number']), df.index)
+        df['area_sqm'] = to_series(caches['area'].map(df['area_raw'], parsers['area']), df.index)
+        df['property_type'] = to_series(
+            caches['property_type'].map(df['property_type_raw'], parsers['property_type']), df.index
+        )
+    
+    def parse_cache_stats(self) -> dict:
+        return {name: cache.stats() for name, cache in self.parse_caches.items()}
+    
+    def transform_stream(self, listing_batches: Iterable[list]) -> Iterator[pd.DataFrame]:
+        if self.workers > 1:
+            yield from self._transform_stream_parallel(listing_batches)
+            return
+        
+        for batch in listing_batches:
+            if not batch:
+                continue
+            df = self.transform_listings(pd.DataFrame(batch))
+            if len(df) > 0:
+                yield df
+    
+    def _transform_stream_parallel(self, listing_batches: Iterable[list]) -> Iterator[pd.DataFrame]:
+        # A bounded window of in-flight batches keeps memory flat; results are yielded in input order
+        pending = deque()
+        for batch in listing_batches:
+            if not batch:
+                continue
+            pending.append(self._process_pool().submit(_transform_in_worker, pd.DataFrame(batch)))
+            if len(pending) >= self.workers * 2:
+                df = pending.popleft().result()
+                if len(df) > 0:
+                    yield df
+        while pending:
+            df = pending.popleft().result()
+            if len(df) > 0:
+                yield df
+    
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.engine,)
+            )
+        return self._pool
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
     def _parse_price(self, price_str: str) -> Optional[float]:
         if pd.isna(price_str) or price_str == 'N/A':
             return None
@@ -67,21 +185,21 @@ class DataTransformer:
         try:
             location_str = str(location_str).strip().lower()
             
-            for key, value in self.location_mappings.items():
-                if key in location_str:
-                    return value
+            mapping_index = self.location_matcher.first_match(location_str)
+            if mapping_index >= 0:
+                return self.location_mappings[self.location_matcher.patterns[mapping_index]]
             
-            for county in self.kenyan_counties:
-                if county.lower() in location_str:
-                    return {'county': county, 'neighborhood': location_str.title()}
+            county_index = self.county_matcher.first_match(location_str)
+            if county_index >= 0:
+                return {'county': self.kenyan_counties[county_index], 'neighborhood': location_str.title()}
             
             parts = location_str.split(',')
             if len(parts) >= 2:
                 neighborhood = parts[0].strip().title()
                 county = parts[1].strip().title()
-                for known_county in self.kenyan_counties:
-                    if known_county.lower() in county.lower():
-                        return {'county': known_county, 'neighborhood': neighborhood}
+                county_index = self.county_matcher.first_match(county.lower())
+                if county_index >= 0:
+                    return {'county': self.kenyan_counties[county_index], 'neighborhood': neighborhood}
             
             return {'county': None, 'neighborhood': location_str.title()}
             
@@ -129,9 +247,9 @@ class DataTransformer:
         try:
             type_str = str(type_str).lower().strip()
             
-            for key, value in self.property_type_mappings.items():
-                if key in type_str:
-                    return value
+            type_index = self.property_type_matcher.first_match(type_str)
+            if type_index >= 0:
+                return self.property_type_mappings[self.property_type_matcher.patterns[type_index]]
             
             return type_str.title()
             
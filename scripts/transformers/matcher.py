@@ -0,0 +1,59 @@
+from collections import deque
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+class PatternMatcher:
+    # Aho-Corasick automaton over a priority-ordered pattern list. first_match returns the index
+    # of the earliest-listed pattern contained in the text, the same answer as testing
+    # `pattern in text` for each pattern in order, in one pass over the text.
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._goto: List[dict] = [{}]
+        self._best: List[int] = [len(self.patterns)]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._best.append(len(self.patterns))
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._best[state] = min(self._best[state], index)
+
+        # _best[state] becomes the lowest pattern index ending at this state or any of its suffixes
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._best[child] = min(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def first_match(self, text: str) -> int:
+        goto, fail, best = self._goto, self._fail, self._best
+        found = best[0]
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best[state] < found:
+                found = best[state]
+                if found == 0:
+                    break
+        return found if found < len(self.patterns) else -1
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+@lru_cache(maxsize=None)
+def _compile(patterns: Tuple[str, ...]) -> PatternMatcher:
+    return PatternMatcher(patterns)
+
+def compile_patterns(patterns: Iterable[str]) -> PatternMatcher:
+    return _compile(tuple(patterns))
@@ -0,0 +1,143 @@
+import zlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from config.settings import DEDUP_CONFIG, TRANSFORM_CONFIG
+
+# Signature value of listings with no text; real minimums practically never reach it
+_EMPTY = np.iinfo(np.uint32).max
+
+class NearDuplicateDetector:
+    # MinHash signatures over word shingles of title and description, bucketed with LSH banding.
+    # Only listings that share a band bucket are compared, so the work grows with the number of
+    # listings rather than the number of pairs; candidates are then checked on estimated
+    # similarity, price and county before they are merged into one property.
+    def __init__(self, num_perm: int = None, bands: int = None, shingle_size: int = None,
+                 similarity_threshold: float = None, price_tolerance: float = None, seed: int = 1):
+        self.num_perm = num_perm or DEDUP_CONFIG['num_perm']
+        self.bands = bands or DEDUP_CONFIG['bands']
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        self.rows_per_band = self.num_perm // self.bands
+        self.shingle_size = shingle_size or DEDUP_CONFIG['shingle_size']
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None else DEDUP_CONFIG['similarity_threshold']
+        self.price_tolerance = price_tolerance if price_tolerance is not None else DEDUP_CONFIG['price_tolerance']
+
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd 64-bit multipliers, keeping the top 32 bits of each product
+        self._a = rng.integers(1, 1 << 63, self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, self.num_perm, dtype=np.uint64)
+        self._shingle_multipliers = rng.integers(1, 1 << 62, self.shingle_size, dtype=np.uint64) | np.uint64(1)
+        self._band_multipliers = rng.integers(1, 1 << 62, self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+    def _tokens(self, df: pd.DataFrame):
+        text = df['title'].fillna('').astype(str) + ' ' + df['description'].fillna('').astype(str)
+        # Punctuation becomes a word break; a pattern that leaves whitespace alone is far cheaper to run
+        words = pc.utf8_split_whitespace(pc.replace_substring_regex(pc.utf8_lower(pa.array(text, pa.string())), r'[^\w\s]+', ' '))
+        offsets = words.offsets.to_numpy()
+
+        # Distinct words are hashed once with a stable hash, so signatures agree across chunks and runs
+        encoded = pc.dictionary_encode(words.flatten())
+        word_hashes = np.fromiter(
+            (zlib.crc32(word.encode('utf-8')) for word in encoded.dictionary.to_pylist()),
+            dtype=np.uint64, count=len(encoded.dictionary),
+        )
+        return word_hashes[encoded.indices.to_numpy()], offsets
+
+    def signatures(self, df: pd.DataFrame) -> np.ndarray:
+        token_hashes, offsets = self._tokens(df)
+        lengths = np.diff(offsets)
+        doc_ids = np.repeat(np.arange(len(df)), lengths)
+
+        # Shingle i covers tokens i .. i + shingle_size - 1 of one listing; listings shorter than a
+        # shingle fall back to single words
+        size = self.shingle_size
+        if len(token_hashes) >= size:
+            shingles = np.zeros(len(token_hashes) - size + 1, dtype=np.uint64)
+            for k in range(size):
+                shingles += token_hashes[k:len(token_hashes) - size + 1 + k] * self._shingle_multipliers[k]
+            valid = doc_ids[:len(shingles)] == doc_ids[size - 1:]
+            shingles, shingle_docs = shingles[valid], doc_ids[:len(shingles)][valid]
+        else:
+            shingles, shingle_docs = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+        short = np.isin(doc_ids, np.flatnonzero(lengths < size))
+        shingles = np.concatenate([shingles, token_hashes[short]])
+        shingle_docs = np.concatenate([shingle_docs, doc_ids[short]])
+
+        order = np.argsort(shingle_docs, kind='stable')
+        shingles, shingle_docs = shingles[order], shingle_docs[order]
+        has_shingles, starts = np.unique(shingle_docs, return_index=True)
+
+        # Listings with no text keep the maximum value everywhere and never share a bucket
+        signatures = np.full((len(df), self.num_perm), _EMPTY, dtype=np.uint32)
+        if len(shingles):
+            for i in range(self.num_perm):
+                hashed = ((shingles * self._a[i] + self._b[i]) >> np.uint64(32)).astype(np.uint32)
+                signatures[has_shingles, i] = np.minimum.reduceat(hashed, starts)
+        return signatures
+
+    def candidate_pairs(self, signatures: np.ndarray) -> np.ndarray:
+        usable = np.flatnonzero(signatures[:, 0] != _EMPTY)
+        pairs = []
+        for band in range(self.bands):
+            rows = signatures[usable, band * self.rows_per_band:(band + 1) * self.rows_per_band].astype(np.uint64)
+            keys = (rows * self._band_multipliers).sum(axis=1)
+            # Sorting groups each bucket; linking neighbours in a bucket chains all of its members
+            # with one pair each, even when a bucket is large
+            order = np.argsort(keys, kind='stable')
+            same = keys[order[1:]] == keys[order[:-1]]
+            pairs.append(np.column_stack([usable[order[:-1][same]], usable[order[1:][same]]]))
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs), axis=1)
+        return np.unique(pairs, axis=0)
+
+    def verify(self, pairs: np.ndarray, signatures: np.ndarray, prices: np.ndarray, counties: np.ndarray) -> np.ndarray:
+        left, right = pairs[:, 0], pairs[:, 1]
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        keep = similarity >= self.similarity_threshold
+
+        # A missing price or county doesn't rule a pair out; two known, different ones do
+        price_left, price_right = prices[left], prices[right]
+        both_priced = ~np.isnan(price_left) & ~np.isnan(price_right)
+        price_gap = np.abs(price_left - price_right) / np.maximum(np.fmax(price_left, price_right), 1)
+        keep &= ~both_priced | (price_gap <= self.price_tolerance)
+
+        county_left, county_right = counties[left], counties[right]
+        keep &= (county_left < 0) | (county_right < 0) | (county_left == county_right)
+        return pairs[keep]
+
+    def cluster(self, signatures: np.ndarray, prices: np.ndarray, counties: np.ndarray) -> np.ndarray:
+        # Returns, for each listing, the position of the first listing of its property
+        prices = np.asarray(prices, dtype=np.float64)
+        counties = pd.factorize(np.asarray(counties, dtype=object), use_na_sentinel=True)[0]
+        pairs = self.verify(self.candidate_pairs(signatures), signatures, prices, counties)
+        return connected_components(len(signatures), pairs)
+
+    def find_duplicates(self, df: pd.DataFrame, chunk_size: int = None) -> np.ndarray:
+        # Signatures are built a chunk at a time, which keeps the per-permutation passes in cache
+        chunk_size = chunk_size or TRANSFORM_CONFIG['chunk_size']
+        signatures = np.concatenate(
+            [self.signatures(df.iloc[start:start + chunk_size]) for start in range(0, len(df), chunk_size)]
+            or [np.zeros((0, self.num_perm), dtype=np.uint32)]
+        )
+        return self.cluster(signatures, df['price_kes'].to_numpy(dtype=np.float64), df['county'].to_numpy())
+
+def connected_components(size: int, pairs: np.ndarray) -> np.ndarray:
+    # Min-label propagation with pointer jumping; each component ends up labelled by its lowest position
+    labels = np.arange(size)
+    if len(pairs) == 0:
+        return labels
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        lowest = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, labels[left], lowest)
+        np.minimum.at(labels, labels[right], lowest)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels[left], labels[right]):
+            return labels
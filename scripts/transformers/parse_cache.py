@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+class ParseCache:
+    # Bounded LRU of raw value -> parsed value. map() factorizes a column, parses only the
+    # distinct values not seen before and spreads the results back over the rows.
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def map(self, series: pd.Series, parse: Callable[[pd.Series], list]) -> np.ndarray:
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        uniques = np.asarray(uniques, dtype=object)
+        parsed = np.empty(len(uniques), dtype=object)
+        unseen = []
+        for position, value in enumerate(uniques):
+            key = None if pd.isna(value) else value
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                parsed[position] = self._entries[key]
+            else:
+                unseen.append(position)
+
+        if unseen:
+            for position, result in zip(unseen, parse(pd.Series(uniques[unseen], dtype=object))):
+                parsed[position] = result
+                value = uniques[position]
+                self._entries[None if pd.isna(value) else value] = result
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        self.misses += len(unseen)
+        self.hits += len(series) - len(unseen)
+        return parsed[codes]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+def to_series(values: np.ndarray, index: pd.Index) -> pd.Series:
+    # Same dtype inference Series.apply performs on the parser outputs
+    return pd.Series(list(values), index=index)
+
+def split_pairs(values: np.ndarray, index: pd.Index) -> List[pd.Series]:
+    return [pd.Series([pair[i] for pair in values], index=index) for i in range(2)]
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Callable, Dict, List, Tuple
+from scripts.transformers.matcher import PatternMatcher
+
+# Column-at-a-time equivalents of DataTransformer's per-row parsers, built on Arrow compute
+# kernels. Each function must return exactly what the matching _parse_* method returns.
+
+ACRE_SQM = 4046.86
+HECTARE_SQM = 10000
+
+# Arrow's ASCII case kernels and RE2's \d only agree with Python's str methods when every
+# non-ASCII character is uncased punctuation or symbol (m², –, €); rows holding non-ASCII
+# letters, digits, whitespace or stray control characters go to the per-row parser instead
+NEEDS_FALLBACK = r'[\x00-\x08\x0E-\x1F\x7F]|[^\x00-\x7F\p{P}\p{Sc}\p{Sm}\p{Sk}\p{No}]'
+
+def _mask(values) -> np.ndarray:
+    return pc.fill_null(values, False).to_numpy(zero_copy_only=False)
+
+def _prepare(series: pd.Series) -> Tuple[pa.Array, np.ndarray, np.ndarray]:
+    missing = (series.isna() | (series == 'N/A')).to_numpy()
+    values = series.to_numpy(dtype=object).copy()
+    values[missing] = ''
+    if pd.api.types.infer_dtype(values, skipna=False) != 'string':
+        values = np.array([str(value) for value in values], dtype=object)
+
+    text = pa.array(values, type=pa.string())
+    fallback = _mask(pc.match_substring_regex(text, NEEDS_FALLBACK)) & ~missing
+    return text, missing, fallback
+
+def _keep_chars(text: pa.Array, allowed: str) -> pa.Array:
+    # Byte-level filter over the Arrow buffers; equivalent to re.sub(f'[^{allowed}]', '', ...) on ASCII rows
+    keep_byte = np.zeros(256, dtype=bool)
+    keep_byte[np.frombuffer(allowed.encode('ascii'), dtype=np.uint8)] = True
+
+    offsets = np.frombuffer(text.buffers()[1], dtype=np.int32)[text.offset:text.offset + len(text) + 1]
+    data = np.frombuffer(text.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]]
+    keep = keep_byte[data]
+    kept_before = np.concatenate([[0], np.cumsum(keep)])
+    new_offsets = kept_before[offsets - offsets[0]].astype(np.int32)
+    return pa.StringArray.from_buffers(len(text), pa.py_buffer(new_offsets), pa.py_buffer(data[keep].tobytes()))
+
+def _apply_fallback(series: pd.Series, rows: np.ndarray, parser: Callable) -> list:
+    return [parser(value) for value in series.to_numpy(dtype=object)[rows]]
+
+def _to_float(text: pa.Array) -> np.ndarray:
+    # Only strings float() would accept reach the cast, which rounds exactly like float()
+    valid = _mask(pc.match_substring_regex(text, r'^(?:\d+\.?\d*|\.\d+)$'))
+    result = np.full(len(text), np.nan)
+    result[valid] = pc.cast(pc.filter(text, pa.array(valid)), pa.float64()).to_numpy()
+    return result
+
+def _first_match(text: pa.Array, matcher: PatternMatcher) -> np.ndarray:
+    # Index of the first pattern contained in each row (-1 for none); each distinct string is matched once
+    encoded = pc.dictionary_encode(text)
+    firsts = np.array([matcher.first_match(value) for value in encoded.dictionary.to_pylist()], dtype=np.int64)
+    return firsts[encoded.indices.to_numpy()]
+
+def parse_price(series: pd.Series, fallback: Callable) -> pd.Series:
+    text, missing, slow = _prepare(series)
+    upper = _keep_chars(pc.ascii_upper(text), '0123456789.KMB')
+
+    has_m = _mask(pc.match_substring(upper, 'M'))
+    has_k = ~has_m & _mask(pc.match_substring(upper, 'K'))
+    has_b = ~has_m & ~has_k & _mask(pc.match_substring(upper, 'B'))
+
+    digits = pc.if_else(pa.array(has_m), pc.replace_substring(upper, 'M', ''),
+             pc.if_else(pa.array(has_k), pc.replace_substring(upper, 'K', ''),
+             pc.if_else(pa.array(has_b), pc.replace_substring(upper, 'B', ''), upper)))
+
+    multiplier = np.select([has_m, has_k, has_b], [1_000_000, 1_000, 1_000_000_000], default=1)
+    price = _to_float(digits) * multiplier
+    price[missing] = np.nan
+    price[slow] = [np.nan if value is None else value for value in _apply_fallback(series, slow, fallback)]
+    return pd.Series(price, index=series.index)
+
+def parse_location(series: pd.Series, location_mappings: Dict[str, dict], location_matcher: PatternMatcher,
+                   counties: List[str], county_matcher: PatternMatcher, fallback: Callable) -> Tuple[pd.Series, pd.Series]:
+    text, missing, slow = _prepare(series)
+    lower = pc.ascii_lower(pc.ascii_trim_whitespace(text))
+
+    mapping_index = _first_match(lower, location_matcher)
+    mapped = mapping_index >= 0
+    county_index = np.where(mapped, -1, _first_match(lower, county_matcher))
+
+    county = np.full(len(text), None, dtype=object)
+    neighborhood = pc.ascii_title(lower).to_numpy(zero_copy_only=False).astype(object)
+
+    targets = [location_mappings[key] for key in location_matcher.patterns]
+    mapped_counties = np.array([target['county'] for target in targets], dtype=object)
+    mapped_neighborhoods = np.array([target['neighborhood'] for target in targets], dtype=object)
+    county[mapped] = mapped_counties[mapping_index[mapped]]
+    neighborhood[mapped] = mapped_neighborhoods[mapping_index[mapped]]
+    in_county = county_index >= 0
+    county[in_county] = np.array(counties, dtype=object)[county_index[in_county]]
+
+    county[missing] = None
+    neighborhood[missing] = None
+    slow_positions = np.flatnonzero(slow)
+    for position, location in zip(slow_positions, _apply_fallback(series, slow, fallback)):
+        county[position] = location['county']
+        neighborhood[position] = location['neighborhood']
+    return pd.Series(county, index=series.index), pd.Series(neighborhood, index=series.index)
+
+def parse_number(series: pd.Series, fallback: Callable) -> pd.Series:
+    text, missing, slow = _prepare(series)
+    numbers = _to_float(pc.struct_field(pc.extract_regex(text, r'(?P<n>\d+)'), [0]))
+    numbers[missing] = np.nan
+    numbers[slow] = [np.nan if value is None else value for value in _apply_fallback(series, slow, fallback)]
+
+    # apply() yields int64 when every row parsed and float64 once any row is None
+    if not np.isnan(numbers).any() and (np.abs(numbers) < 2 ** 53).all():
+        return pd.Series(numbers.astype('int64'), index=series.index)
+    return pd.Series(numbers, index=series.index)
+
+def parse_area(series: pd.Series, fallback: Callable) -> pd.Series:
+    text, missing, slow = _prepare(series)
+    lower = pc.ascii_lower(text)
+    area = _to_float(pc.struct_field(pc.extract_regex(lower, r'(?P<n>\d+\.?\d*)'), [0]))
+
+    is_acre = _mask(pc.match_substring(lower, 'acre'))
+    is_hectare = ~is_acre & (_mask(pc.match_substring(lower, 'hectare')) | _mask(pc.match_substring(lower, 'ha')))
+    area[is_acre] = area[is_acre] * ACRE_SQM
+    area[is_hectare] = area[is_hectare] * HECTARE_SQM
+    area[missing] = np.nan
+    area[slow] = [np.nan if value is None else value for value in _apply_fallback(series, slow, fallback)]
+    return pd.Series(area, index=series.index)
+
+def standardize_property_type(series: pd.Series, property_type_mappings: Dict[str, str], property_type_matcher: PatternMatcher,
+                              fallback: Callable) -> pd.Series:
+    text, missing, slow = _prepare(series)
+    lower = pc.ascii_trim_whitespace(pc.ascii_lower(text))
+
+    type_index = _first_match(lower, property_type_matcher)
+    matched = type_index >= 0
+    result = pc.ascii_title(lower).to_numpy(zero_copy_only=False).astype(object)
+    targets = np.array([property_type_mappings[key] for key in property_type_matcher.patterns], dtype=object)
+    result[matched] = targets[type_index[matched]]
+    result[missing] = None
+    result[slow] = _apply_fallback(series, slow, fallback)
+    return pd.Series(result, index=series.index)
@@ -0,0 +1,32 @@
+-- Price drops in Kilimani over the last 90 days
+SELECT
+    current.listing_url,
+    previous_point.previous_price,
+    current.price_kes as price,
+    ROUND(((current.price_kes - previous_point.previous_price) * 100.0 / previous_point.previous_price)::numeric, 1) as change_pct,
+    previous_point.previous_scraped_at,
+    current.scraped_at
+FROM listing_price_history current
+CROSS JOIN LATERAL (
+    SELECT price_kes as previous_price, scraped_at as previous_scraped_at
+    FROM listing_price_history previous
+    WHERE previous.listing_url = current.listing_url
+        AND previous.scraped_at < current.scraped_at
+    ORDER BY previous.scraped_at DESC
+    LIMIT 1
+) previous_point
+WHERE current.scraped_at >= NOW() - INTERVAL '90 days'
+    AND current.neighborhood = 'Kilimani'
+    AND current.price_kes < previous_point.previous_price
+ORDER BY change_pct;
+
+-- Daily median asking price in Nairobi over the last 90 days
+SELECT
+    DATE(scraped_at) as scrape_date,
+    COUNT(*) as price_points,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY price_kes) as median_price
+FROM listing_price_history
+WHERE scraped_at >= NOW() - INTERVAL '90 days'
+    AND county = 'Nairobi'
+GROUP BY DATE(scraped_at)
+ORDER BY scrape_date;
@@ -0,0 +1,66 @@
+-- Average price by county
+SELECT
+    county,
+    price_count as listing_count,
+    price_sum / NULLIF(price_count, 0) as avg_price,
+    price_min as min_price,
+    price_max as max_price,
+    median_price,
+    p90_price
+FROM county_price_summary
+WHERE price_count > 0
+ORDER BY listing_count DESC;
+
+-- Average price per bedroom by county
+SELECT
+    county,
+    bedrooms,
+    price_count as listing_count,
+    price_sum / NULLIF(price_count, 0) as avg_price,
+    median_price,
+    p90_price
+FROM county_bedroom_price_summary
+WHERE price_count > 0
+    AND bedrooms BETWEEN 1 AND 6
+ORDER BY county, bedrooms;
+
+-- Property type distribution
+SELECT
+    property_type,
+    listing_count as count,
+    ROUND(listing_count * 100.0 / SUM(listing_count) OVER (), 2) as percentage
+FROM property_type_price_summary
+ORDER BY count DESC;
+
+-- Average price by property type
+SELECT
+    property_type,
+    price_count as listing_count,
+    price_sum / NULLIF(price_count, 0) as avg_price,
+    price_min as min_price,
+    price_max as max_price
+FROM property_type_price_summary
+WHERE price_count > 0
+ORDER BY avg_price DESC;
+
+-- Top neighborhoods by listing count in Nairobi
+SELECT
+    neighborhood,
+    listing_count,
+    price_sum / NULLIF(price_count, 0) as avg_price,
+    bedrooms_sum / NULLIF(bedrooms_count, 0) as avg_bedrooms
+FROM neighborhood_price_summary
+WHERE county = 'Nairobi'
+ORDER BY listing_count DESC
+LIMIT 20;
+
+-- Nairobi vs Mombasa comparison
+SELECT
+    county,
+    price_count as total_listings,
+    price_sum / NULLIF(price_count, 0) as avg_price,
+    median_price,
+    bedrooms_sum / NULLIF(bedrooms_count, 0) as avg_bedrooms,
+    area_sum / NULLIF(area_count, 0) as avg_area_sqm
+FROM county_price_summary
+WHERE county IN ('Nairobi', 'Mombasa');
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from config.database import Base, CleanedListing
+from config.settings import LOADER_CONFIG
+from scripts.loaders import database_loader
+from scripts.loaders.database_loader import DatabaseLoader
+
+@pytest.fixture
+def loader(monkeypatch):
+    # The per-row load path only issues portable ORM statements, so an in-memory SQLite database
+    # stands in for Postgres; the Postgres-only summary and history writes are switched off
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database_loader, 'get_session', sessionmaker(bind=engine))
+    monkeypatch.setitem(LOADER_CONFIG, 'bulk_load', False)
+    monkeypatch.setitem(LOADER_CONFIG, 'refresh_summaries', False)
+    monkeypatch.setitem(LOADER_CONFIG, 'record_price_history', False)
+    with DatabaseLoader() as loader:
+        yield loader
+
+def cleaned_frame(**overrides) -> pd.DataFrame:
+    row = {
+        'source_site': 'buyrentkenya', 'listing_url': 'https://example.com/listing/1', 'title': '3 Bedroom Apartment',
+        'description': 'Spacious', 'price_kes': 12500000.0, 'county': 'Nairobi', 'neighborhood': 'Kilimani',
+        'bedrooms': 3, 'bathrooms': 2, 'area_sqm': 120.0, 'property_type': 'Apartment', 'content_hash': 'a' * 32,
+    }
+    row.update(overrides)
+    return pd.DataFrame([row])
+
+def test_update_keeps_assigned_property_id(loader):
+    loader.load_raw_listings([{'source_site': 'buyrentkenya', 'listing_url': 'https://example.com/listing/1'}])
+    assert loader.load_cleaned_listings(cleaned_frame()) == 1
+    listing = loader.session.query(CleanedListing).one()
+    listing.property_id = 42
+    loader.session.commit()
+
+    loader.load_cleaned_listings(cleaned_frame(price_kes=11000000.0, content_hash='b' * 32))
+
+    listing = loader.session.query(CleanedListing).one()
+    assert listing.price_kes == 11000000.0
+    assert listing.property_id == 42
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+from scripts.benchmark_transformer import TYPICAL_VALUES, EDGE_CASE_VALUES, PARSED_COLUMNS, parsed_columns
+from scripts.transformers import DataTransformer
+
+# Suffixes, currencies and ranges spelled the ways the sites spell them, plus places outside Kenya
+EXTRA_VALUES = {
+    'price_raw': [
+        'KES 2.5m', 'ksh 750k', 'KSh 1.2 M', '4M', 'USD 1,500', '$ 250,000', 'KSh 30,000 - 40,000',
+        'Ksh 5M-6M', 'KSh -', '0', 'KSh 0.00',
+    ],
+    'location_raw': ['Kampala, Uganda', 'Dar es Salaam', 'London', 'Nairobi, Kenya', 'KAREN'],
+    'bedrooms_raw': ['3-4 beds', '0', 'bed'],
+    'bathrooms_raw': ['', '2+ baths'],
+    'area_raw': ['', '0 sqm', '1,000 m2', '0.25 Acres', '5,000 sq ft'],
+    'property_type_raw': ['', 'APARTMENT', 'house for rent', 'Land'],
+}
+
+def edge_case_frame() -> pd.DataFrame:
+    # Every value of every column appears at least once; shorter columns wrap around
+    values_by_column = {
+        column: TYPICAL_VALUES[column] + EDGE_CASE_VALUES[column] + EXTRA_VALUES[column]
+        for column in TYPICAL_VALUES
+    }
+    size = max(len(values) for values in values_by_column.values())
+    data = {column: [values[i % len(values)] for i in range(size)] for column, values in values_by_column.items()}
+    data['source_site'] = 'test'
+    data['listing_url'] = [f"https://example.com/listing/{i}" for i in range(size)]
+    return pd.DataFrame(data)
+
+@pytest.mark.parametrize('column', PARSED_COLUMNS)
+def test_parsed_column_matches_apply_engine(column):
+    df = edge_case_frame()
+    expected = parsed_columns('apply', df)[column]
+    actual = parsed_columns('vectorized', df)[column]
+    pd.testing.assert_series_equal(actual, expected, check_dtype=expected.notna().any())
+
+def test_transform_listings_matches_apply_engine():
+    df = edge_case_frame()
+    expected = DataTransformer(engine='apply').transform_listings(df.copy())
+    actual = DataTransformer(engine='vectorized').transform_listings(df.copy())
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(actual, expected)